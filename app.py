@@ -1,46 +1,47 @@
 import streamlit as st
-import os
-from pathlib import Path
+
+from utils.catalog import get_catalog
+from utils.corpus import read_page
 
 # --- Load and process data ---
-def load_page_content(page_path):
-    with open(page_path, "r", encoding="utf-8") as f:
-        return f.read()
+# Papers are page folders or single-file archives under data/ocr_pdf;
+# utils/corpus.py reads both.
+def load_page_content(pdf_name, page_name):
+    return read_page(pdf_name, page_name)
+
+catalog = get_catalog()
 
 # --- Streamlit UI ---
 st.title("Journal Data Explorer")
 
 # Select a PDF file (e.g., aaaj_2025)
-pdf_dir = Path("data/ocr_pdf")
 selected_pdf = st.selectbox(
     "Select a PDF file:",
-    [f.name for f in pdf_dir.glob("*") if f.is_file()],
+    catalog.papers(),
 )
 
 # List all pages in the selected PDF
-pages_dir = Path(f"data/ocr_pdf/{selected_pdf}/pages")
-page_files = sorted([f.stem.replace("page_", "") for f in pages_dir.glob("*.md")])
+page_files = [
+    name[:-len(".md")].replace("page_", "")
+    for name in catalog.page_names(selected_pdf)
+]
 selected_page = st.selectbox(
     "Select a page:",
     page_files,
 )
 
 # Display the content
-page_content = load_page_content(f"{pages_dir}/{f'page_{selected_page}.md'}")
+page_content = load_page_content(selected_pdf, f"page_{selected_page}.md")
 
 st.subheader(f"Page {selected_page}")
 st.text(page_content)  # Raw text
 
 # --- Optional: Advanced Features ---
-# Example: Split into paragraphs and visualize word frequency
-from collections import Counter
-import re
-
-def analyze_text(text):
-    words = re.findall(r'\w+', text.lower())
-    return Counter(words)
+# Word frequency from the precomputed per-page index (utils/page_index.py)
+from utils.page_index import load_page_index, token_counts
 
-word_counts = analyze_text(page_content)
+page_index = load_page_index(selected_pdf, stats=catalog.page_stats(selected_pdf))
+word_counts = token_counts(page_index, [f"page_{selected_page}.md"])
 st.dataframe(word_counts.most_common(10))  # Top 10 words
 
 
@@ -1,15 +1,27 @@
 import streamlit as st
-import os
-import glob
-import re
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
 
+from functools import partial
+
+from utils.catalog import get_catalog
+from utils.corpus import open_paper
+from utils.header_templates import MIN_SCORE, auto_segment, build_templates
+from utils.parallel import run_parallel
+from utils.segment_store import get_segment_store
+from utils.viewers import text_window
+from utils.sections import (
+    clean_header,
+    custom_header_spans,
+    join_spans,
+    parse_custom_segments,
+    with_pages,
+)
+
 DATA_ROOT = "data/ocr_pdf"
-APPROVED_FILE = "data/approved_segments.json"
+APPROVED_FILE = "data/approved_segments.jsonl"
 
 st.title("🧠 Custom Header Segmentation + Clustering (Header-Keyed)")
 
@@ -17,11 +29,29 @@ st.title("🧠 Custom Header Segmentation + Clustering (Header-Keyed)")
 # SAFE PDF FOLDER LISTING
 # ==========================================================
 
-pdf_folders = [
-    d for d in os.listdir(DATA_ROOT)
-    if os.path.isdir(os.path.join(DATA_ROOT, d))
-    and not d.startswith(".")
-]
+catalog = get_catalog(DATA_ROOT)
+
+# Approvals are appended to a log; only the approved papers are written,
+# whatever the size of the archive.
+approved_store = get_segment_store(APPROVED_FILE)
+
+def load_approved():
+    return approved_store.load_all()
+
+def save_approved(updates, fingerprints):
+    approved_store.put(updates, fingerprints)
+
+def approval_current(paper):
+    """False when the paper's text changed after its segmentation was approved."""
+    fingerprint = approved_store.fingerprint(paper)
+    if fingerprint is None:
+        # Approved before fingerprints were stored.
+        return True
+    return fingerprint == open_paper(
+        paper, DATA_ROOT, stats=catalog.page_stats(paper)
+    ).fingerprint
+
+pdf_folders = catalog.papers()
 
 if not pdf_folders:
     st.warning("No PDF folders found.")
@@ -33,29 +63,21 @@ selected_pdf = st.sidebar.selectbox("Select PDF Folder", pdf_folders)
 # LOAD FULL TEXT
 # ==========================================================
 
-def read_all_pages(pdf_name):
-    folder_path = os.path.join(DATA_ROOT, pdf_name, "pages")
-
-    if not os.path.exists(folder_path):
-        return ""
-
-    page_files = sorted(glob.glob(os.path.join(folder_path, "*.md")))
-
-    full_text = ""
-
-    for file in page_files:
-        with open(file, "r", encoding="utf-8") as f:
-            full_text += f.read() + "\n"
-
-    return full_text
-
-
-full_text = read_all_pages(selected_pdf)
+packed = open_paper(
+    selected_pdf, DATA_ROOT, stats=catalog.page_stats(selected_pdf)
+)
+full_text = packed.full_text()
 
 if not full_text:
     st.warning("No markdown content found.")
     st.stop()
 
+if selected_pdf in approved_store and not approval_current(selected_pdf):
+    st.warning(
+        "⚠️ This paper's text changed after its segmentation was approved; "
+        "the stored segments no longer match it. Segment and approve it again."
+    )
+
 # ==========================================================
 # USER HEADER INPUT
 # ==========================================================
@@ -74,64 +96,6 @@ user_input = st.text_area(
 # References"""
 )
 
-# ==========================================================
-# HELPER FUNCTIONS
-# ==========================================================
-
-def clean_header(header):
-    header = re.sub(r"^#+\s*", "", header)
-    header = re.sub(r"^\d+\.\s*", "", header)
-    return header.strip()
-
-
-def split_by_custom_headers(full_text, header_lines):
-
-    cleaned_headers = [clean_header(h) for h in header_lines if h.strip()]
-
-    positions = []
-
-    for header in cleaned_headers:
-        match = re.search(re.escape(header), full_text, re.IGNORECASE)
-        if match:
-            positions.append((match.start(), header))
-
-    positions = sorted(positions, key=lambda x: x[0])
-
-    segments = {}
-
-    if not positions:
-        return segments
-
-    # ======================================================
-    # 1️⃣ TEXT BEFORE FIRST HEADER
-    # ======================================================
-
-    first_start = positions[0][0]
-
-    if first_start > 0:
-        pre_text = full_text[:first_start].strip()
-        if len(pre_text) > 30:
-            segments["Pre-Section"] = pre_text
-
-    # ======================================================
-    # 2️⃣ HEADER SEGMENTS
-    # ======================================================
-
-    for i in range(len(positions)):
-
-        start = positions[i][0]
-        header_label = positions[i][1]
-
-        end = positions[i + 1][0] if i + 1 < len(positions) else len(full_text)
-
-        segment_text = full_text[start:end].strip()
-
-        if len(segment_text) > 30:
-            segments[header_label] = segment_text
-
-    return segments
-
-
 # ==========================================================
 # SEGMENTATION
 # ==========================================================
@@ -140,7 +104,16 @@ if user_input:
 
     header_lines = user_input.split("\n")
 
-    segments = split_by_custom_headers(full_text, header_lines)
+    # Approved segmentations store spans with their page ranges; the text
+    # is only needed here.
+    segment_spans = {
+        header: with_pages(spans, packed.char_offsets)
+        for header, spans in custom_header_spans(full_text, header_lines).items()
+    }
+    segments = {
+        header: join_spans(full_text, spans)
+        for header, spans in segment_spans.items()
+    }
 
     if not segments:
         st.warning("No matching headers found.")
@@ -164,9 +137,10 @@ if user_input:
         list(segments.keys())
     )
 
-    st.text_area(
+    text_window(
         "Full Section Text",
         segments[selected_header],
+        key="full_section_text",
         height=300
     )
 
@@ -228,20 +202,136 @@ if user_input:
 
     if st.button("Approve Segmentation"):
 
-        os.makedirs("data", exist_ok=True)
+        save_approved({selected_pdf: segment_spans}, {selected_pdf: packed.fingerprint})
 
-        if os.path.exists(APPROVED_FILE):
-            with open(APPROVED_FILE, "r", encoding="utf-8") as f:
-                approved_data = json.load(f)
-        else:
-            approved_data = {}
+        st.success("Segmentation stored successfully!")
 
-        approved_data[selected_pdf] = segments
+    # ==========================================================
+    # BATCH APPLY
+    # ==========================================================
 
-        with open(APPROVED_FILE, "w", encoding="utf-8") as f:
-            json.dump(approved_data, f, indent=4)
+    st.subheader("📚 Apply Header List to Multiple Papers")
 
-        st.success("Segmentation stored successfully!")
+    batch_papers = st.multiselect(
+        "Papers",
+        pdf_folders,
+        default=[selected_pdf]
+    )
+
+    if st.button("Segment Selected Papers") and batch_papers:
+
+        progress_bar = st.progress(0.0, text="Segmenting papers...")
+
+        def report(done, total):
+            progress_bar.progress(done / total, text=f"Segmented {done}/{total} papers")
+
+        results = run_parallel(
+            partial(parse_custom_segments, header_lines=header_lines, data_dir=DATA_ROOT),
+            batch_papers,
+            progress=report,
+        )
+
+        progress_bar.empty()
+
+        st.session_state.batch_segments = {
+            "header_lines": header_lines,
+            "records": results,
+        }
+
+    # Results for an earlier header list must not be approved under this one.
+    batch = st.session_state.get("batch_segments")
+    if batch and batch["header_lines"] != header_lines:
+        del st.session_state.batch_segments
+        batch = None
+
+    batch_records = batch["records"] if batch else []
+
+    if batch_records:
+
+        wanted = [clean_header(h) for h in header_lines if clean_header(h)]
+
+        st.dataframe(pd.DataFrame([
+            {
+                "paper": r["journal_name"],
+                "segments": len(r["segments"]),
+                "missing headers": ", ".join(
+                    h for h in dict.fromkeys(wanted) if h not in r["segments"]
+                ),
+            }
+            for r in batch_records
+        ]))
+
+        if st.button("Approve All"):
+
+            found = {r["journal_name"]: r["segments"] for r in batch_records if r["segments"]}
+            save_approved(found, {r["journal_name"]: r["fingerprint"] for r in batch_records})
+
+            st.success(f"Stored segmentation for {len(found)} papers!")
+
+# ==========================================================
+# AUTO-SEGMENT FROM APPROVED TEMPLATES
+# ==========================================================
+
+# Header sets of approved papers become templates; unsegmented papers are
+# matched to the closest one on the process pool. Only papers that match
+# no template need headers pasted by hand.
+
+st.subheader("🤖 Auto-Segment New Papers from Approved Templates")
+
+approved_now = load_approved()
+templates = build_templates(approved_now)
+# Papers whose text changed since approval are segmented again.
+unsegmented = [
+    p for p in pdf_folders
+    if p not in approved_store or not approval_current(p)
+]
+
+st.caption(
+    f"{len(templates)} templates from {len(approved_now)} approved papers; "
+    f"{len(unsegmented)} papers not segmented yet."
+)
+
+min_score = st.slider(
+    "Minimum share of template headers found",
+    0.0, 1.0, MIN_SCORE, 0.05
+)
+
+if st.button("Auto-Segment Unsegmented Papers") and templates and unsegmented:
+
+    progress_bar = st.progress(0.0, text="Matching templates...")
+
+    def report_auto(done, total):
+        progress_bar.progress(done / total, text=f"Matched {done}/{total} papers")
+
+    st.session_state.auto_segments = run_parallel(
+        partial(auto_segment, templates=templates, min_score=min_score, data_dir=DATA_ROOT),
+        unsegmented,
+        progress=report_auto,
+    )
+
+    progress_bar.empty()
+
+auto_records = st.session_state.get("auto_segments", [])
+
+if auto_records:
+
+    st.dataframe(pd.DataFrame([
+        {
+            "paper": r["journal_name"],
+            "template": r["template"],
+            "score": r["score"],
+            "segments": len(r["segments"] or {}),
+            "status": "matched" if r["segments"] else "needs manual headers",
+        }
+        for r in auto_records
+    ]))
+
+    matched = {r["journal_name"]: r["segments"] for r in auto_records if r["segments"]}
+
+    if matched and st.button(f"Approve {len(matched)} Matched Papers"):
+        save_approved(matched, {r["journal_name"]: r["fingerprint"] for r in auto_records})
+        st.session_state.auto_segments = [r for r in auto_records if not r["segments"]]
+        st.success(f"Stored segmentation for {len(matched)} papers!")
 
 
 # import streamlit as st
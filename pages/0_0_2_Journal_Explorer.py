@@ -1,10 +1,11 @@
 import streamlit as st
-import os
-import glob
 import pandas as pd
 import matplotlib.pyplot as plt
 from collections import Counter
-import re
+
+from utils.catalog import get_catalog
+from utils.corpus import read_page
+from utils.page_index import load_page_index, token_counts, word_counts
 
 DATA_DIR = "data/ocr_pdf"
 
@@ -14,23 +15,19 @@ st.title("📚 Journal Page Explorer")
 # Helper Functions
 # ------------------------
 
+# Papers may be page folders or single-file archives; utils/corpus.py
+# reads both. Listings come from the watched catalog, not a rescan.
+
+catalog = get_catalog(DATA_DIR)
+
 def get_pdfs():
-    return [
-        d for d in os.listdir(DATA_DIR)
-        if os.path.isdir(os.path.join(DATA_DIR, d))
-    ]
+    return catalog.papers()
 
 def get_pages(pdf_name):
-    page_path = os.path.join(DATA_DIR, pdf_name, "pages")
-    return sorted(glob.glob(os.path.join(page_path, "*.md")))
-
-def read_markdown(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        return f.read()
+    return catalog.page_names(pdf_name)
 
-def compute_word_stats(text):
-    words = re.findall(r'\b\w+\b', text.lower())
-    return words, len(words)
+def read_markdown(pdf_name, page_name):
+    return read_page(pdf_name, page_name, DATA_DIR)
 
 # ------------------------
 # Sidebar Controls
@@ -41,7 +38,7 @@ selected_pdf = st.sidebar.selectbox("Select Journal", pdf_list)
 
 pages = get_pages(selected_pdf)
 
-page_options = ["All Pages"] + [os.path.basename(p) for p in pages]
+page_options = ["All Pages"] + pages
 selected_page = st.sidebar.selectbox("Select Page", page_options)
 
 viz_type = st.sidebar.selectbox(
@@ -53,17 +50,16 @@ viz_type = st.sidebar.selectbox(
 # Load Content
 # ------------------------
 
-page_texts = []
-page_names = []
+# Word and token counts come from the per-page index (utils/page_index.py);
+# page text is only read for "Raw Markdown".
+page_index = load_page_index(
+    selected_pdf, DATA_DIR, stats=catalog.page_stats(selected_pdf)
+)
 
 if selected_page == "All Pages":
-    for p in pages:
-        page_texts.append(read_markdown(p))
-        page_names.append(os.path.basename(p))
+    page_names = pages
 else:
-    selected_path = os.path.join(DATA_DIR, selected_pdf, "pages", selected_page)
-    page_texts.append(read_markdown(selected_path))
-    page_names.append(selected_page)
+    page_names = [selected_page]
 
 # ------------------------
 # Visualization
@@ -71,18 +67,15 @@ else:
 
 if viz_type == "Raw Markdown":
     st.subheader("📄 Markdown Content")
-    st.markdown(page_texts[0])
+    st.markdown(read_markdown(selected_pdf, page_names[0]))
 
 elif viz_type == "Word Count per Page":
     st.subheader("📊 Word Count Distribution")
 
-    word_counts = []
-    for text in page_texts:
-        _, count = compute_word_stats(text)
-        word_counts.append(count)
+    page_word_counts = word_counts(page_index, page_names)
 
     fig = plt.figure()
-    plt.bar(page_names, word_counts)
+    plt.bar(page_names, page_word_counts)
     plt.xticks(rotation=90)
     plt.ylabel("Word Count")
     plt.title("Word Count per Page")
@@ -92,17 +85,15 @@ elif viz_type == "Word Count per Page":
 elif viz_type == "Top Keywords":
     st.subheader("🔎 Top Keywords")
 
-    combined_text = " ".join(page_texts)
-    words, _ = compute_word_stats(combined_text)
-
     stopwords = set([
         "the","and","of","to","in","a","for","is","on","that",
         "with","as","by","an","are","this","be","or","from"
     ])
 
-    filtered = [w for w in words if w not in stopwords and len(w) > 3]
-
-    counter = Counter(filtered)
+    counter = Counter({
+        w: c for w, c in token_counts(page_index, page_names).items()
+        if w not in stopwords and len(w) > 3
+    })
     top_words = counter.most_common(20)
 
     df = pd.DataFrame(top_words, columns=["Word", "Frequency"])
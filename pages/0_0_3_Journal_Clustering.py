@@ -1,73 +1,60 @@
 import streamlit as st
 import os
-import glob
 import json
-import re
 import pandas as pd
 import matplotlib.pyplot as plt
+from functools import partial
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
 
+from utils.catalog import get_catalog
+from utils.fileio import atomic_open
+from utils.parallel import default_workers, run_parallel
+from utils.sections import materialise, parse_cluster_text, stale_papers
+
 DATA_DIR = "data/ocr_pdf"
 OUTPUT_FILE = "data/cluster_journal_text.json"
 
+SECTION_FIELDS = ["abstract", "introduction", "literature_review"]
+
 st.title("🧠 Journal Section Clustering Dashboard")
 
+catalog = get_catalog(DATA_DIR)
+
+workers = st.sidebar.number_input(
+    "Worker processes",
+    min_value=1,
+    max_value=default_workers(),
+    value=default_workers()
+)
+
 # --------------------------------------------------
 # Helper Functions
 # --------------------------------------------------
 
-def read_all_pages(pdf_folder):
-    pages_path = os.path.join(pdf_folder, "pages")
-    page_files = sorted(glob.glob(os.path.join(pages_path, "*.md")))
-
-    full_text = ""
-    for file in page_files:
-        with open(file, "r", encoding="utf-8") as f:
-            full_text += f.read() + "\n"
-    return full_text
-
-
-def extract_section(text, section_keywords):
-    pattern = r"(#.+?)\n"
-    headers = [(m.start(), m.group()) for m in re.finditer(pattern, text)]
-
-    for i, (pos, header) in enumerate(headers):
-        header_lower = header.lower()
-
-        if any(keyword in header_lower for keyword in section_keywords):
-            start = pos
-            end = headers[i + 1][0] if i + 1 < len(headers) else len(text)
-            return text[start:end].strip()
+def parse_all_pdfs(papers):
+    progress_bar = st.progress(0.0, text="Extracting sections...")
 
-    return ""
+    def report(done, total):
+        progress_bar.progress(done / total, text=f"Extracted {done}/{total} papers")
 
+    cluster_data = run_parallel(
+        partial(parse_cluster_text, data_dir=DATA_DIR),
+        papers,
+        workers=workers,
+        progress=report,
+    )
 
-def parse_all_pdfs():
-    cluster_data = []
+    progress_bar.empty()
 
-    pdf_folders = [
-        os.path.join(DATA_DIR, d)
-        for d in os.listdir(DATA_DIR)
-        if os.path.isdir(os.path.join(DATA_DIR, d))
-    ]
-
-    for pdf_folder in pdf_folders:
-        journal_name = os.path.basename(pdf_folder)
-        full_text = read_all_pages(pdf_folder)
-
-        abstract = extract_section(full_text, ["abstract"])
-        introduction = extract_section(full_text, ["introduction"])
-        literature_review = extract_section(full_text, ["literature review"])
+    return cluster_data
 
-        cluster_data.append({
-            "journal_name": journal_name,
-            "abstract": abstract,
-            "introduction": introduction,
-            "literature_review": literature_review
-        })
 
-    return cluster_data
+def save_cluster_data(data):
+    # Sections are stored as spans into the corpus, not as text. Written
+    # atomically, so a crash mid-save leaves the previous file intact.
+    with atomic_open(OUTPUT_FILE, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
 
 
 # --------------------------------------------------
@@ -76,10 +63,7 @@ def parse_all_pdfs():
 
 if st.button("🔄 Parse All Journals"):
 
-    data = parse_all_pdfs()
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    save_cluster_data(parse_all_pdfs(catalog.papers()))
 
     st.success("Cluster text saved to JSON!")
 
@@ -91,10 +75,33 @@ if os.path.exists(OUTPUT_FILE):
     with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
         cluster_data = json.load(f)
 
+    # Spans are only valid for the text they were taken from: papers whose
+    # text changed since the last parse (or parsed before fingerprints were
+    # stored) are re-extracted before anything reads them, and papers no
+    # longer in the corpus are dropped.
+    known = set(catalog.papers())
+    cluster_data = [r for r in cluster_data if r["journal_name"] in known]
+    stale = stale_papers(cluster_data, DATA_DIR, catalog.page_stats)
+
+    if stale:
+        fresh = {r["journal_name"]: r for r in parse_all_pdfs(stale)}
+        cluster_data = [fresh.get(r["journal_name"], r) for r in cluster_data]
+        save_cluster_data(cluster_data)
+        st.info(f"Re-extracted {len(stale)} paper(s) whose text changed since the last parse.")
+
     df = pd.DataFrame(cluster_data)
 
     st.subheader("📋 Parsed Journal Sections")
-    st.dataframe(df)
+    st.dataframe(pd.DataFrame({
+        "journal_name": df["journal_name"],
+        **{
+            f"{field} chars": [
+                len(v) if isinstance(v, str) else sum(sp[1] - sp[0] for sp in v or [])
+                for v in df[field]
+            ]
+            for field in SECTION_FIELDS
+        }
+    }))
 
     # --------------------------------------------------
     # Clustering Section
@@ -106,6 +113,10 @@ if os.path.exists(OUTPUT_FILE):
 
     if st.button("🚀 Run Clustering"):
 
+        df = pd.DataFrame(materialise(
+            cluster_data, fields=SECTION_FIELDS, data_dir=DATA_DIR
+        ))
+
         text_data = (
             df["introduction"].fillna("") +
             " " +
@@ -1,170 +1,79 @@
 import streamlit as st
 import os
-import glob
-import json
-import re
 import pandas as pd
 
+from utils.corpus import open_paper
+from utils.manifest import update_partitioned_output
+from utils.parallel import default_workers
+from utils.section_store import read_metadata, read_row, read_rows, stored_papers
+from utils.sections import (
+    LABELS_EXTRACTOR,
+    StaleSpansError,
+    parse_labeled_sections,
+    section_text,
+    spans_page_range,
+)
+from utils.viewers import text_window
+
 DATA_DIR = "data/ocr_pdf"
-OUTPUT_FILE = "data/cluster_journal_label.json"
+# One Parquet file per paper (utils/section_store.py).
+OUTPUT_DIR = "data/cluster_journal_label"
 
 st.title("📑 Robust Journal Section Extractor (With Others + Coverage)")
 
+workers = st.sidebar.number_input(
+    "Worker processes",
+    min_value=1,
+    max_value=default_workers(),
+    value=default_workers()
+)
+
 # --------------------------------------------------
 # Helper Functions
 # --------------------------------------------------
 
-def read_all_pages(pdf_folder):
-    pages_path = os.path.join(pdf_folder, "pages")
-    page_files = sorted(glob.glob(os.path.join(pages_path, "*.md")))
-
-    full_text = ""
-    for file in page_files:
-        with open(file, "r", encoding="utf-8") as f:
-            full_text += f.read() + "\n"
-
-    return full_text
-
-
-def split_sections_with_others(text):
-    """
-    Detect structured sections and compute leftover text using index boundaries.
-    """
-
-    pattern = r"""
-    (
-        ^\s*#+\s+.*$           |   # Markdown headers
-        ^\s*\d+\.\s+.*$        |   # 1. Introduction
-        ^\s*Abstract\s*$       |   # Abstract
-        ^\s*Literature review.*$
-    )
-    """
-
-    matches = list(
-        re.finditer(
-            pattern,
-            text,
-            re.MULTILINE | re.IGNORECASE | re.VERBOSE
-        )
+def compute_coverage(journal_name, rows):
+    total_chars = open_paper(journal_name, DATA_DIR).char_offsets[-1]
+    structured_chars = sum(
+        r["char_count"] for r in rows
+        if r["journal_name"] == journal_name and r["section_label"] != "others"
     )
 
-    sections = {}
-    covered_ranges = []
-
-    for i, match in enumerate(matches):
-        header = match.group().strip().lower()
-        start = match.start()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-
-        content = text[start:end].strip()
-        covered_ranges.append((start, end))
-
-        if "abstract" in header:
-            sections["abstract"] = content
-        elif "introduction" in header:
-            sections["introduction"] = content
-        elif "literature" in header:
-            sections["literature_review"] = content
-
-    # ----------------------------------------------
-    # Compute leftover text using gaps
-    # ----------------------------------------------
-
-    remaining_chunks = []
-    last_end = 0
-
-    for start, end in sorted(covered_ranges):
-        if start > last_end:
-            remaining_chunks.append(text[last_end:start])
-        last_end = end
-
-    if last_end < len(text):
-        remaining_chunks.append(text[last_end:])
-
-    remaining_text = "\n".join(remaining_chunks).strip()
-
-    return sections, remaining_text
-
-
-def compute_metadata(text):
-    words = re.findall(r"\b\w+\b", text)
-    sentences = re.split(r"[.!?]+", text)
+    coverage_ratio = structured_chars / total_chars if total_chars > 0 else 0
 
     return {
-        "word_count": len(words),
-        "sentence_count": len([s for s in sentences if s.strip()]),
-        "char_count": len(text)
+        "journal_name": journal_name,
+        "total_characters": total_chars,
+        "structured_characters": structured_chars,
+        "coverage_ratio": round(coverage_ratio, 3)
     }
 
 
 def parse_all_pdfs():
-    cluster_data = []
-    coverage_stats = []
-
-    pdf_folders = [
-        os.path.join(DATA_DIR, d)
-        for d in os.listdir(DATA_DIR)
-        if os.path.isdir(os.path.join(DATA_DIR, d))
-    ]
-
-    for pdf_folder in pdf_folders:
-
-        journal_name = os.path.basename(pdf_folder)
-        full_text = read_all_pages(pdf_folder)
-
-        extracted_sections, remaining_text = split_sections_with_others(full_text)
-
-        total_chars = len(full_text)
-        structured_chars = 0
-
-        # ------------------------------
-        # Store structured sections
-        # ------------------------------
-
-        for label, text in extracted_sections.items():
-            metadata = compute_metadata(text)
-            structured_chars += metadata["char_count"]
-
-            cluster_data.append({
-                "journal_name": journal_name,
-                "section_label": label,
-                "word_count": metadata["word_count"],
-                "sentence_count": metadata["sentence_count"],
-                "char_count": metadata["char_count"],
-                "text": text
-            })
-
-        # ------------------------------
-        # Store others
-        # ------------------------------
-
-        if len(remaining_text) > 100:
-
-            metadata = compute_metadata(remaining_text)
-
-            cluster_data.append({
-                "journal_name": journal_name,
-                "section_label": "others",
-                "word_count": metadata["word_count"],
-                "sentence_count": metadata["sentence_count"],
-                "char_count": metadata["char_count"],
-                "text": remaining_text
-            })
-
-        # ------------------------------
-        # Coverage Diagnostics
-        # ------------------------------
+    """
+    Re-extract only new or changed papers (see utils/manifest.py) on a
+    process pool and rewrite their files in OUTPUT_DIR.
+    """
+    progress_bar = st.progress(0.0, text="Extracting sections...")
+
+    def report(done, total):
+        progress_bar.progress(done / total, text=f"Extracted {done}/{total} papers")
+
+    changed, removed = update_partitioned_output(
+        OUTPUT_DIR,
+        parse_labeled_sections,
+        extractor=LABELS_EXTRACTOR,
+        data_dir=DATA_DIR,
+        workers=workers,
+        progress=report,
+    )
 
-        coverage_ratio = structured_chars / total_chars if total_chars > 0 else 0
+    progress_bar.empty()
 
-        coverage_stats.append({
-            "journal_name": journal_name,
-            "total_characters": total_chars,
-            "structured_characters": structured_chars,
-            "coverage_ratio": round(coverage_ratio, 3)
-        })
+    changed_rows = read_rows(OUTPUT_DIR, changed)
+    coverage_stats = [compute_coverage(name, changed_rows) for name in changed]
 
-    return cluster_data, coverage_stats
+    return coverage_stats, removed
 
 
 # --------------------------------------------------
@@ -173,33 +82,58 @@ def parse_all_pdfs():
 
 if st.button("🔄 Parse Journals (Robust Mode)"):
 
-    data, coverage = parse_all_pdfs()
-
-    os.makedirs("data", exist_ok=True)
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    coverage, removed = parse_all_pdfs()
 
-    st.success("✅ JSON Generated Successfully!")
+    if coverage or removed:
+        st.success(
+            f"✅ Sections updated: {len(coverage)} paper(s) re-extracted, "
+            f"{len(removed)} removed."
+        )
+        if coverage:
+            st.dataframe(pd.DataFrame(coverage))
+    else:
+        st.info("No new or changed papers since the last run.")
 
 # --------------------------------------------------
 # Load and Display
 # --------------------------------------------------
 
-if os.path.exists(OUTPUT_FILE):
+# Metadata columns only; re-read when a paper file is replaced or removed.
+@st.cache_data
+def load_section_table(output_dir, stamp):
+    return read_metadata(output_dir)
 
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-        cluster_data = json.load(f)
+if stored_papers(OUTPUT_DIR):
 
-    df = pd.DataFrame(cluster_data)
+    df = load_section_table(OUTPUT_DIR, os.stat(OUTPUT_DIR).st_mtime_ns)
 
     st.subheader("📊 Extracted Sections")
     st.dataframe(df[["journal_name", "section_label", "word_count"]])
 
     st.subheader("📄 Preview Text")
 
+    # Only the selected row's spans are read from its paper's file, and
+    # only the pages those spans cover from the corpus.
     selected_row = st.selectbox("Select Row", df.index)
-    st.text_area("Section Content", df.loc[selected_row, "text"], height=400)
+    selected = df.loc[selected_row]
+    record = read_row(OUTPUT_DIR, selected["journal_name"], selected["row"])
+
+    try:
+        content = section_text(record, DATA_DIR)
+    except StaleSpansError as e:
+        # The paper changed since extraction; its old offsets are not shown.
+        st.warning(f"⚠️ {e}")
+        st.stop()
+
+    pages = spans_page_range(record["spans"])
+    if pages:
+        st.caption(f"Pages {pages[0] + 1}–{pages[1]}")
+    text_window(
+        "Section Content",
+        content,
+        key="section_content",
+        height=400
+    )
 
 else:
     st.info("Click 'Parse Journals (Robust Mode)' to generate dataset.")
@@ -3,6 +3,8 @@ import json
 import os
 import pandas as pd
 
+from utils.catalog import get_catalog
+
 CONFIG_PATH = "data/label_code.json"
 
 st.title("🏷 Section Label Configuration Manager")
@@ -46,6 +48,9 @@ if st.button("Save / Update Label"):
         with open(CONFIG_PATH, "w", encoding="utf-8") as f:
             json.dump(label_config, f, indent=4)
 
+        # Let the extractor pages see the new labels on their next rerun.
+        get_catalog().refresh()
+
         st.success("Label updated successfully!")
 
 # --------------------------------------------------
@@ -62,4 +67,7 @@ if st.button("Delete Label"):
     with open(CONFIG_PATH, "w", encoding="utf-8") as f:
         json.dump(label_config, f, indent=4)
 
+    # Let the extractor pages see the new labels on their next rerun.
+    get_catalog().refresh()
+
     st.warning("Label deleted.")
@@ -1,13 +1,25 @@
 import streamlit as st
 import os
-import glob
 import json
-import re
-import pandas as pd
+import hashlib
+from functools import partial
+
+from utils.manifest import update_partitioned_output
+from utils.parallel import default_workers
+from utils.section_store import read_metadata, read_row, stored_papers
+from utils.sections import (
+    DYNAMIC_EXTRACTOR,
+    StaleSpansError,
+    parse_dynamic_sections,
+    section_text,
+    spans_page_range,
+)
+from utils.viewers import text_window
 
 DATA_DIR = "data/ocr_pdf"
 CONFIG_PATH = "data/label_code.json"
-OUTPUT_FILE = "data/cluster_journal_label.json"
+# One Parquet file per paper (utils/section_store.py).
+OUTPUT_DIR = "data/cluster_journal_dynamic"
 
 st.title("📑 Dynamic Journal Section Extractor")
 
@@ -19,137 +31,54 @@ if not os.path.exists(CONFIG_PATH):
     st.error("No label_code.json found. Create labels first.")
     st.stop()
 
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    label_config = json.load(f)
+# Reloaded whenever label_code.json's mtime or size moves. The labels and
+# the version recorded in the manifest come from the same read, so an
+# extraction is never filed under a newer config than it used.
+@st.cache_data
+def load_label_config(path, stamp):
+    with open(path, "rb") as f:
+        data = f.read()
+    return json.loads(data), hashlib.sha1(data).hexdigest()
+
+config_stat = os.stat(CONFIG_PATH)
+label_config, label_version = load_label_config(
+    CONFIG_PATH, (config_stat.st_mtime_ns, config_stat.st_size)
+)
 
 st.sidebar.subheader("📌 Active Labels")
 st.sidebar.json(label_config)
 
+workers = st.sidebar.number_input(
+    "Worker processes",
+    min_value=1,
+    max_value=default_workers(),
+    value=default_workers()
+)
+
 # --------------------------------------------------
 # Helper Functions
 # --------------------------------------------------
 
-def read_all_pages(pdf_folder):
-    pages_path = os.path.join(pdf_folder, "pages")
-    page_files = sorted(glob.glob(os.path.join(pages_path, "*.md")))
-
-    full_text = ""
-    for file in page_files:
-        with open(file, "r", encoding="utf-8") as f:
-            full_text += f.read() + "\n"
-
-    return full_text
-
-
-def split_sections(text):
-
-    pattern = r"""
-    (
-        ^\s*#+\s+.*$           |
-        ^\s*\d+\.\s+.*$
-    )
-    """
-
-    matches = list(
-        re.finditer(
-            pattern,
-            text,
-            re.MULTILINE | re.IGNORECASE | re.VERBOSE
-        )
-    )
-
-    sections = {}
-    covered_ranges = []
-
-    for i, match in enumerate(matches):
-        header = match.group().strip().lower()
-        start = match.start()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-
-        content = text[start:end].strip()
-        covered_ranges.append((start, end))
-
-        for label_key, variants in label_config.items():
-            for variant in variants:
-                if variant in header:
-                    sections[label_key] = content
-                    break
-
-    # -----------------------------------------
-    # Compute leftover text
-    # -----------------------------------------
-
-    remaining_chunks = []
-    last_end = 0
-
-    for start, end in sorted(covered_ranges):
-        if start > last_end:
-            remaining_chunks.append(text[last_end:start])
-        last_end = end
-
-    if last_end < len(text):
-        remaining_chunks.append(text[last_end:])
-
-    remaining_text = "\n".join(remaining_chunks).strip()
-
-    return sections, remaining_text
-
-
-def compute_metadata(text):
-    words = re.findall(r"\b\w+\b", text)
-    sentences = re.split(r"[.!?]+", text)
-
-    return {
-        "word_count": len(words),
-        "sentence_count": len([s for s in sentences if s.strip()]),
-        "char_count": len(text)
-    }
-
-
 def parse_all_pdfs():
+    progress_bar = st.progress(0.0, text="Extracting sections...")
+
+    def report(done, total):
+        progress_bar.progress(done / total, text=f"Extracted {done}/{total} papers")
+
+    # Label edits change the config hash and force a full re-extraction.
+    result = update_partitioned_output(
+        OUTPUT_DIR,
+        partial(parse_dynamic_sections, label_config=label_config, data_dir=DATA_DIR),
+        extractor=DYNAMIC_EXTRACTOR,
+        label_version=label_version,
+        data_dir=DATA_DIR,
+        workers=workers,
+        progress=report,
+    )
 
-    cluster_data = []
-
-    pdf_folders = [
-        os.path.join(DATA_DIR, d)
-        for d in os.listdir(DATA_DIR)
-        if os.path.isdir(os.path.join(DATA_DIR, d))
-    ]
-
-    for pdf_folder in pdf_folders:
-
-        journal_name = os.path.basename(pdf_folder)
-        full_text = read_all_pages(pdf_folder)
-
-        extracted_sections, remaining_text = split_sections(full_text)
-
-        # Store structured sections
-        for label, text in extracted_sections.items():
-            metadata = compute_metadata(text)
-
-            cluster_data.append({
-                "journal_name": journal_name,
-                "section_label": label,
-                "word_count": metadata["word_count"],
-                "sentence_count": metadata["sentence_count"],
-                "char_count": metadata["char_count"],
-                "text": text
-            })
-
-        # Store others
-        if len(remaining_text) > 100:
-            metadata = compute_metadata(remaining_text)
-
-            cluster_data.append({
-                "journal_name": journal_name,
-                "section_label": "others",
-                "word_count": metadata["word_count"],
-                "sentence_count": metadata["sentence_count"],
-                "char_count": metadata["char_count"],
-                "text": remaining_text
-            })
+    progress_bar.empty()
 
-    return cluster_data
+    return result
 
 
 # --------------------------------------------------
@@ -158,31 +87,54 @@ def parse_all_pdfs():
 
 if st.button("🚀 Run Extraction"):
 
-    data = parse_all_pdfs()
+    changed, removed = parse_all_pdfs()
 
-    os.makedirs("data", exist_ok=True)
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-
-    st.success("Extraction complete!")
+    if changed or removed:
+        st.success(
+            f"Extraction complete! {len(changed)} paper(s) re-extracted, "
+            f"{len(removed)} removed."
+        )
+    else:
+        st.info("No new or changed papers since the last run.")
 
 
 # --------------------------------------------------
 # Display Results
 # --------------------------------------------------
 
-if os.path.exists(OUTPUT_FILE):
+# Metadata columns only; re-read when a paper file is replaced or removed.
+@st.cache_data
+def load_section_table(output_dir, stamp):
+    return read_metadata(output_dir)
 
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-        cluster_data = json.load(f)
+if stored_papers(OUTPUT_DIR):
 
-    df = pd.DataFrame(cluster_data)
+    df = load_section_table(OUTPUT_DIR, os.stat(OUTPUT_DIR).st_mtime_ns)
 
     st.subheader("📊 Extracted Dataset")
     st.dataframe(df[["journal_name", "section_label", "word_count"]])
 
     st.subheader("📄 Preview")
 
+    # Only the selected row's spans are read from its paper's file, and
+    # only the pages those spans cover from the corpus.
     selected_row = st.selectbox("Select Row", df.index)
-    st.text_area("Section Content", df.loc[selected_row, "text"], height=400)
+    selected = df.loc[selected_row]
+    record = read_row(OUTPUT_DIR, selected["journal_name"], selected["row"])
+
+    try:
+        content = section_text(record, DATA_DIR)
+    except StaleSpansError as e:
+        # The paper changed since extraction; its old offsets are not shown.
+        st.warning(f"⚠️ {e}")
+        st.stop()
+
+    pages = spans_page_range(record["spans"])
+    if pages:
+        st.caption(f"Pages {pages[0] + 1}–{pages[1]}")
+    text_window(
+        "Section Content",
+        content,
+        key="section_content",
+        height=400
+    )
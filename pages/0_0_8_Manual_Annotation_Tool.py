@@ -1,36 +1,50 @@
 import streamlit as st
-import os
-import glob
-import json
-import re
+from bisect import bisect_left, bisect_right
 import pandas as pd
 import matplotlib.pyplot as plt
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
 
+from utils.annotation_store import (
+    connect,
+    load_annotations,
+    paper_stamp,
+    save_annotation,
+    stale_labels,
+)
+from utils.catalog import get_catalog
+from utils.corpus import open_paper
+from utils.intervals import IntervalSet
+from utils.sections import find_occurrences, span_text, with_pages
+from utils.text_metrics import word_count
+from utils.viewers import text_window
+
 DATA_ROOT = "data/ocr_pdf"
-ANNOTATION_FILE = "data/manual_annotation_paper.json"
+ANNOTATION_DB = "data/manual_annotations.sqlite"
 
 st.title("📝 Manual Annotation + Analysis Dashboard")
 
 # ==========================================================
-# LOAD ANNOTATION FILE
+# OPEN ANNOTATION STORE
 # ==========================================================
 
-if os.path.exists(ANNOTATION_FILE):
-    with open(ANNOTATION_FILE, "r", encoding="utf-8") as f:
-        manual_annotations = json.load(f)
-else:
-    manual_annotations = {}
+# SQLite in WAL mode (utils/annotation_store.py); the first connection
+# imports data/manual_annotation_paper.json. One connection is opened per
+# process and shared by every session; only the selected paper's rows are
+# read per rerun.
+@st.cache_resource
+def annotation_db(path):
+    return connect(path, check_same_thread=False)
+
+conn = annotation_db(ANNOTATION_DB)
 
 # ==========================================================
 # SELECT PDF
 # ==========================================================
 
-pdf_folders = [
-    d for d in os.listdir(DATA_ROOT)
-    if os.path.isdir(os.path.join(DATA_ROOT, d))
-]
+catalog = get_catalog(DATA_ROOT)
+
+pdf_folders = catalog.papers()
 
 selected_pdf = st.sidebar.selectbox("Select PDF Folder", pdf_folders)
 
@@ -38,22 +52,39 @@ selected_pdf = st.sidebar.selectbox("Select PDF Folder", pdf_folders)
 # LOAD FULL TEXT
 # ==========================================================
 
-def read_all_pages(pdf_name):
-    folder_path = os.path.join(DATA_ROOT, pdf_name, "pages")
-    page_files = sorted(glob.glob(os.path.join(folder_path, "*.md")))
-
-    full_text = ""
-    for file in page_files:
-        with open(file, "r", encoding="utf-8") as f:
-            full_text += f.read() + "\n"
-
-    return full_text
-
-
-full_text = read_all_pages(selected_pdf)
-
-if selected_pdf not in manual_annotations:
-    manual_annotations[selected_pdf] = {}
+packed = open_paper(
+    selected_pdf, DATA_ROOT, stats=catalog.page_stats(selected_pdf)
+)
+full_text = packed.full_text()
+
+paper_annotations = load_annotations(conn, selected_pdf)
+
+# Spans saved against an earlier version of this paper's text point at the
+# wrong characters now; they are left out until annotated again.
+stale = stale_labels(conn, selected_pdf, packed.fingerprint)
+if stale:
+    st.warning(
+        f"⚠️ This paper's text changed after these annotations were saved: "
+        f"{', '.join(stale)}. They are ignored until saved again."
+    )
+    paper_annotations = {
+        label: value for label, value in paper_annotations.items()
+        if label not in stale
+    }
+
+# Annotations are stored as {label: spans} into the paper's full text, so
+# a repeated passage stays anchored to the occurrence chosen at save time.
+# Each span also records the pages it falls on. Entries saved before
+# offsets were stored are plain text and anchored to their first occurrence.
+
+def annotation_spans(value):
+    if isinstance(value, str):
+        start = full_text.find(value)
+        return [] if start == -1 else [[start, start + len(value)]]
+    return value
+
+def annotation_stamp():
+    return paper_stamp(conn, selected_pdf), packed.fingerprint
 
 # ==========================================================
 # ANNOTATION TABLE
@@ -63,12 +94,13 @@ st.subheader("📋 Manual Annotation Table")
 
 annotation_records = []
 
-for label, text in manual_annotations[selected_pdf].items():
+for label, value in paper_annotations.items():
+    text = span_text(full_text, value)
     annotation_records.append({
         "journal_name": selected_pdf,
         "section_label": label,
         "char_count": len(text),
-        "word_count": len(re.findall(r"\b\w+\b", text))
+        "word_count": word_count(text)
     })
 
 df_annotations = pd.DataFrame(annotation_records)
@@ -78,6 +110,63 @@ if not df_annotations.empty:
 else:
     st.info("No annotations yet.")
 
+# ==========================================================
+# COVERAGE STATE
+# ==========================================================
+
+# Covered ranges live in an IntervalSet kept in session state, next to the
+# uncovered gaps as parallel lists of bounds and text. Saving an annotation
+# adds one interval to the set and cuts only the gaps it overlaps; both are
+# only rebuilt when the paper or the annotation file changes underneath us.
+
+def build_coverage():
+    covered = IntervalSet()
+    for value in paper_annotations.values():
+        for start, end, *_ in annotation_spans(value):
+            covered.add(start, end)
+
+    gaps = list(covered.gaps(0, len(full_text)))
+
+    return {
+        "paper": selected_pdf,
+        "stamp": annotation_stamp(),
+        "covered": covered,
+        "gap_starts": [start for start, _ in gaps],
+        "gap_ends": [end for _, end in gaps],
+        "gap_texts": [full_text[start:end] for start, end in gaps],
+        "remaining": None,
+    }
+
+def cut_gaps(state, start, end):
+    """Remove [start, end) from the gaps, touching only those it overlaps."""
+    starts, ends, texts = state["gap_starts"], state["gap_ends"], state["gap_texts"]
+
+    lo = bisect_right(ends, start)
+    hi = bisect_left(starts, end)
+    if lo >= hi:
+        return
+
+    pieces = []
+    if starts[lo] < start:
+        pieces.append((starts[lo], start))
+    if ends[hi - 1] > end:
+        pieces.append((end, ends[hi - 1]))
+
+    starts[lo:hi] = [s for s, _ in pieces]
+    ends[lo:hi] = [e for _, e in pieces]
+    texts[lo:hi] = [full_text[s:e] for s, e in pieces]
+    state["remaining"] = None
+
+coverage_state = st.session_state.get("annotation_coverage")
+
+if (
+    coverage_state is None
+    or coverage_state["paper"] != selected_pdf
+    or coverage_state["stamp"] != annotation_stamp()
+):
+    coverage_state = build_coverage()
+    st.session_state.annotation_coverage = coverage_state
+
 # ==========================================================
 # ADD NEW ANNOTATION
 # ==========================================================
@@ -87,64 +176,72 @@ st.subheader("➕ Add Annotation")
 new_label = st.text_input("Section Label (e.g., Methodology)")
 new_text = st.text_area("Paste Text Segment Here", height=200)
 
+snippet = new_text.strip()
+occurrences = find_occurrences(full_text, snippet)
+
+def describe_occurrence(i):
+    start = occurrences[i]
+    context = full_text[max(0, start - 60):start].replace("\n", " ")
+    return f"#{i + 1} at character {start}: …{context}"
+
+occurrence = 0
+if len(occurrences) > 1:
+    occurrence = st.selectbox(
+        f"This passage occurs {len(occurrences)} times. Which one?",
+        range(len(occurrences)),
+        format_func=describe_occurrence
+    )
+
 if st.button("Save Annotation"):
 
-    if new_label and new_text:
-        manual_annotations[selected_pdf][new_label] = new_text
+    if new_label and snippet:
 
-        os.makedirs("data", exist_ok=True)
+        if occurrences:
+            start = occurrences[occurrence]
+            paper_annotations[new_label] = with_pages(
+                [[start, start + len(snippet)]], packed.char_offsets
+            )
+        else:
+            # Not found verbatim: keep the text; it counts for clustering
+            # but not for coverage.
+            paper_annotations[new_label] = snippet
+            st.warning("Passage not found in the paper text; coverage is unchanged.")
+
+        replaced = save_annotation(
+            conn, selected_pdf, new_label, paper_annotations[new_label],
+            fingerprint=packed.fingerprint if occurrences else None
+        )
+
+        if replaced:
+            coverage_state = build_coverage()
+        else:
+            for start, end, *_ in annotation_spans(paper_annotations[new_label]):
+                coverage_state["covered"].add(start, end)
+                cut_gaps(coverage_state, start, end)
+            coverage_state["stamp"] = annotation_stamp()
 
-        with open(ANNOTATION_FILE, "w", encoding="utf-8") as f:
-            json.dump(manual_annotations, f, indent=4)
+        st.session_state.annotation_coverage = coverage_state
 
         st.success("Annotation saved successfully!")
 
 # ==========================================================
-# ROBUST REMAINING TEXT (INDEX-BASED)
+# REMAINING TEXT (INTERVAL-BASED)
 # ==========================================================
 
 st.subheader("🧠 Remaining (Unannotated) Text")
 
-annotated_ranges = []
-
-for text in manual_annotations[selected_pdf].values():
-    start_index = full_text.find(text)
-    if start_index != -1:
-        end_index = start_index + len(text)
-        annotated_ranges.append((start_index, end_index))
-
-annotated_ranges = sorted(annotated_ranges)
-
-# Merge overlapping
-merged_ranges = []
-for start, end in annotated_ranges:
-    if not merged_ranges:
-        merged_ranges.append([start, end])
-    else:
-        prev_start, prev_end = merged_ranges[-1]
-        if start <= prev_end:
-            merged_ranges[-1][1] = max(prev_end, end)
-        else:
-            merged_ranges.append([start, end])
-
-remaining_chunks = []
-last_end = 0
-
-for start, end in merged_ranges:
-    if start > last_end:
-        remaining_chunks.append(full_text[last_end:start])
-    last_end = end
+covered = coverage_state["covered"]
 
-if last_end < len(full_text):
-    remaining_chunks.append(full_text[last_end:])
+if coverage_state["remaining"] is None:
+    coverage_state["remaining"] = "\n".join(coverage_state["gap_texts"]).strip()
 
-remaining_text = "\n".join(remaining_chunks).strip()
+remaining_text = coverage_state["remaining"]
 
-coverage = 1 - (len(remaining_text) / len(full_text)) if len(full_text) > 0 else 0
+coverage = covered.covered / len(full_text) if len(full_text) > 0 else 0
 
 st.metric("Annotation Coverage", f"{coverage:.2%}")
 
-st.text_area("Remaining Text", remaining_text, height=350)
+text_window("Remaining Text", remaining_text, key="remaining_text", height=350)
 
 # ==========================================================
 # CLUSTER MANUALLY ANNOTATED SECTIONS
@@ -159,8 +256,8 @@ if not df_annotations.empty:
     if st.button("Run Clustering"):
 
         text_data = [
-            manual_annotations[selected_pdf][label]
-            for label in manual_annotations[selected_pdf]
+            span_text(full_text, value)
+            for value in paper_annotations.values()
         ]
 
         vectorizer = TfidfVectorizer(stop_words="english", max_features=2000)
@@ -170,7 +267,7 @@ if not df_annotations.empty:
         cluster_labels = model.fit_predict(X)
 
         df_cluster = pd.DataFrame({
-            "section_label": list(manual_annotations[selected_pdf].keys()),
+            "section_label": list(paper_annotations.keys()),
             "cluster": cluster_labels
         })
 
@@ -0,0 +1,88 @@
+import streamlit as st
+import pandas as pd
+
+from utils.catalog import get_catalog
+from utils.corpus import read_page
+from utils.parallel import default_workers
+from utils.search_index import index_summary, search, update_index
+
+DATA_DIR = "data/ocr_pdf"
+
+st.title("🔍 Full-Text Search")
+
+catalog = get_catalog(DATA_DIR)
+
+# --------------------------------------------------
+# Keep the index current
+# --------------------------------------------------
+
+# Only papers whose pages changed since the last update are re-indexed;
+# a rerun with an unchanged catalog version skips the check entirely.
+if st.session_state.get("search_index_version") != catalog.version:
+    progress_bar = st.progress(0.0, text="Indexing pages...")
+
+    def report(done, total):
+        progress_bar.progress(done / total, text=f"Indexed {done}/{total} papers")
+
+    update_index(DATA_DIR, catalog=catalog, workers=default_workers(), progress=report)
+    progress_bar.empty()
+
+    st.session_state.search_index_version = catalog.version
+
+n_papers, n_pages = index_summary()
+st.sidebar.caption(f"Indexed: {n_papers} papers, {n_pages} pages")
+
+# --------------------------------------------------
+# Search
+# --------------------------------------------------
+
+query = st.text_input(
+    "Search OCR text",
+    placeholder='"life cycle assessment" circular'
+)
+st.caption('Wrap words in "quotes" to search for an exact phrase.')
+
+papers = st.sidebar.multiselect("Limit to journals", catalog.papers())
+limit = st.sidebar.slider("Max hits", 10, 200, 50)
+
+if not query:
+    st.stop()
+
+hits = search(query, limit=limit, papers=papers)
+
+if not hits:
+    st.info("No matches.")
+    st.stop()
+
+df = pd.DataFrame([
+    {
+        "paper": h["paper"],
+        "page": h["page"],
+        "score": round(h["score"], 3),
+        "matches": len(h["offsets"]),
+        "first offset": h["offsets"][0][0] if h["offsets"] else None,
+    }
+    for h in hits
+])
+
+st.subheader(f"📋 {len(hits)} matching pages")
+st.dataframe(df)
+
+# --------------------------------------------------
+# Hit Preview
+# --------------------------------------------------
+
+st.subheader("📄 Preview")
+
+for h in hits[:10]:
+    with st.expander(f"{h['paper']} — {h['page']} ({len(h['offsets'])} matches)"):
+        st.markdown(h["snippet"])
+
+        if st.checkbox("Show full page", key=f"{h['paper']}/{h['page']}"):
+            text = read_page(h["paper"], h["page"], DATA_DIR)
+            start, end = h["offsets"][0] if h["offsets"] else (0, 0)
+            st.text_area(
+                f"Page text (first match at {start}–{end})",
+                text,
+                height=300
+            )
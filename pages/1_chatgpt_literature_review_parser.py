@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
 import re
-import json
 from pathlib import Path
 from datetime import datetime
 
+from utils.batch_store import append_batch, list_batches, read_batch
+from utils.viewers import json_window
+
 # =========================================================
 # PAGE CONFIG
 # =========================================================
@@ -22,7 +24,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-JSON_PATH = DATA_DIR / "parsed_literature.json"
+# One batch per line plus a batch_id -> offset index (utils/batch_store.py);
+# the old parsed_literature.json is imported on first use.
+JSONL_PATH = DATA_DIR / "parsed_literature.jsonl"
 
 # =========================================================
 # INPUT
@@ -86,18 +90,6 @@ def extract_annotated_bibliography(text: str) -> list:
     ]
 
 
-def load_existing_json(path: Path) -> list:
-    if not path.exists() or path.stat().st_size == 0:
-        return []
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def save_json(path: Path, data: list):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
-
 # =========================================================
 # PARSE BUTTON
 # =========================================================
@@ -128,12 +120,10 @@ if st.button("🔍 Parse & Save") and raw_text.strip():
     }
 
     # ---------- Persist ----------
-    all_batches = load_existing_json(JSON_PATH)
-    all_batches.append(record)
-    save_json(JSON_PATH, all_batches)
+    append_batch(record, JSONL_PATH)
 
     # ---------- UI Feedback ----------
-    st.success("✅ Parsing complete & JSON saved")
+    st.success("✅ Parsing complete & batch saved")
 
     # ---------- Display ----------
     st.subheader("📘 Parsed Sections")
@@ -151,12 +141,23 @@ if st.button("🔍 Parse & Save") and raw_text.strip():
 st.divider()
 st.subheader("📂 Existing Parsed Batches")
 
-existing = load_existing_json(JSON_PATH)
+existing = list_batches(JSONL_PATH)
 
 if not existing:
     st.info("No saved batches yet.")
 else:
-    st.json(existing)
+    st.dataframe(
+        pd.DataFrame(existing).drop(columns=["offset", "length"]),
+        use_container_width=True
+    )
+
+    shown = st.selectbox(
+        "Show batch:",
+        range(len(existing)),
+        index=len(existing) - 1,
+        format_func=lambda i: existing[i]["batch_id"]
+    )
+    json_window(read_batch(existing[shown], JSONL_PATH), key="batch_json")
 
 
 # import streamlit as st
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import json
 from pathlib import Path
 
+from utils.batch_store import list_batches, read_batches
+from utils.viewers import json_window
+
 # =========================================================
 # PAGE CONFIG
 # =========================================================
@@ -12,28 +14,24 @@ st.set_page_config(
 )
 
 st.title("📂 Literature Review Database Browser")
-st.caption("Read-only retrieval & visualization from parsed_literature.json")
+st.caption("Read-only retrieval & visualization from parsed_literature.jsonl")
 
 # =========================================================
 # PATHS
 # =========================================================
 BASE_DIR = Path.cwd()
 DATA_DIR = BASE_DIR / "data"
-JSON_PATH = DATA_DIR / "parsed_literature.json"
+JSONL_PATH = DATA_DIR / "parsed_literature.jsonl"
 
 # =========================================================
-# LOAD DATABASE
+# LOAD INDEX
 # =========================================================
-def load_database(path: Path):
-    if not path.exists():
-        return []
-    with open(path, "r") as f:
-        return json.load(f)
-
-database = load_database(JSON_PATH)
+# Only the batch index is read here; batch bodies are read with a seek
+# once one is selected.
+batch_index = list_batches(JSONL_PATH)
 
-if not database:
-    st.warning("No data found in parsed_literature.json")
+if not batch_index:
+    st.warning("No data found in parsed_literature.jsonl")
     st.stop()
 
 # =========================================================
@@ -77,7 +75,7 @@ def flatten_batches(batches):
 # =========================================================
 st.subheader("🔽 Select Batch")
 
-batch_ids = ["ALL (combined)"] + [b["batch_id"] for b in database]
+batch_ids = ["ALL (combined)"] + [b["batch_id"] for b in batch_index]
 
 selected_batch = st.selectbox(
     "Choose batch to retrieve:",
@@ -85,11 +83,11 @@ selected_batch = st.selectbox(
 )
 
 if selected_batch == "ALL (combined)":
-    selected_batches = database
+    selected_batches = read_batches(JSONL_PATH)
 else:
-    selected_batches = [
-        b for b in database if b["batch_id"] == selected_batch
-    ]
+    selected_batches = read_batches(JSONL_PATH, [
+        b for b in batch_index if b["batch_id"] == selected_batch
+    ])
 
 # =========================================================
 # RETRIEVE DATA
@@ -135,7 +133,7 @@ else:
 # =========================================================
 st.divider()
 st.subheader("🧾 Raw JSON View (Audit Mode)")
-st.json(selected_batches)
+json_window(selected_batches, key="audit_json")
 
 
 # import streamlit as st
@@ -4,6 +4,8 @@ import re
 import requests
 from urllib.parse import urlparse
 
+from utils.viewers import paginated_json
+
 # =========================================================
 # PAGE CONFIG
 # =========================================================
@@ -153,11 +155,18 @@ if st.button("🔍 Build Metadata Table") and raw_urls.strip():
 
         rows.append(row)
 
+    # Kept across reruns so paging through the JSON preview does not
+    # require rebuilding (and re-fetching) the table.
+    st.session_state.reference_rows = rows
+
+# =========================================================
+# DISPLAY
+# =========================================================
+if "reference_rows" in st.session_state:
+
+    rows = st.session_state.reference_rows
     df = pd.DataFrame(rows)
 
-    # =====================================================
-    # DISPLAY
-    # =====================================================
     st.subheader("📊 Reference Metadata Table")
     st.dataframe(df, use_container_width=True)
 
@@ -169,7 +178,7 @@ if st.button("🔍 Build Metadata Table") and raw_urls.strip():
     )
 
     st.subheader("🧾 Raw JSON Preview")
-    st.json(rows)
+    paginated_json(rows, key="reference_json")
 
 
 # import streamlit as st
@@ -11,6 +11,8 @@ from sklearn.decomposition import PCA
 from bertopic import BERTopic
 from umap import UMAP
 
+from utils.data_loader import data_source_selector, with_category
+
 # --------------------------------------------------
 # Streamlit setup
 # --------------------------------------------------
@@ -29,15 +31,8 @@ MISSING_VALUES = {
 # --------------------------------------------------
 # Data loading
 # --------------------------------------------------
-@st.cache_data
-def load_data(file):
-    return pd.read_csv(file)
-
-uploaded_file = st.file_uploader("Upload journal CSV", type=["csv"])
-if not uploaded_file:
-    st.stop()
-
-df_raw = load_data(uploaded_file)
+# Year stays text: the validation below counts the values that do not parse.
+df_raw = data_source_selector(fill_required=False, raw_columns=["Year"])
 
 st.subheader("📄 Raw Dataset Preview")
 st.dataframe(df_raw.head(), use_container_width=True)
@@ -81,7 +76,7 @@ if "Abstract" in df.columns:
     )
 
 if "Journal" in df.columns:
-    df["Journal"] = df["Journal"].replace(
+    df["Journal"] = with_category(df["Journal"], "Unknown").replace(
         MISSING_VALUES["Journal"], "Unknown"
     )
 
@@ -97,7 +92,7 @@ if not required_cols.issubset(df.columns):
     st.stop()
 
 df["Title"] = df["Title"].fillna("")
-df["Journal"] = df["Journal"].fillna("Unknown")
+df["Journal"] = with_category(df["Journal"], "Unknown").fillna("Unknown")
 
 # --------------------------------------------------
 # ✅ SAFE YEAR HANDLING (INTEGRATED FIX)
@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
 import json
 import re
 
+from utils.catalog import get_catalog
+from utils.data_loader import data_source_selector, with_category
+from utils.viewers import paginated_json
+
 # --------------------------------------------------
 # Streamlit setup
 # --------------------------------------------------
@@ -34,30 +37,31 @@ def load_clusters(path="data/cluster.json", version=0):
     with open(path, "r") as f:
         return json.load(f)
 
-clusters = load_clusters(version=st.session_state.cluster_version)
-st.sidebar.json(clusters)
+# The catalog bumps its version when cluster.json changes on disk.
+clusters = load_clusters(
+    version=(st.session_state.cluster_version, get_catalog().version)
+)
+paginated_json(clusters, key="cluster_dictionary", container=st.sidebar)
 
 # --------------------------------------------------
 # Load dataset
 # --------------------------------------------------
-@st.cache_data
-def load_data(file):
-    return pd.read_csv(file)
-
-uploaded_file = st.file_uploader("Upload journal CSV", type=["csv"])
-if not uploaded_file:
-    st.stop()
-
-df = load_data(uploaded_file)
-
-# --------------------------------------------------
-# Preserve original schema
-# --------------------------------------------------
 EXPECTED_COLUMNS = [
     "DOI", "Title", "Authors", "Journal", "Year", "Abstract",
     "LitmapsId", "Cited By", "References", "PubMedId", "Tags"
 ]
 
+# Only the exported columns are read, and the counts keep their CSV text
+# so the export writes them back unchanged.
+df = data_source_selector(
+    usecols=EXPECTED_COLUMNS,
+    fill_required=False,
+    raw_columns=["Year", "Cited By", "References"]
+)
+
+# --------------------------------------------------
+# Preserve original schema
+# --------------------------------------------------
 for col in EXPECTED_COLUMNS:
     if col not in df.columns:
         df[col] = ""
@@ -67,7 +71,7 @@ for col in EXPECTED_COLUMNS:
 # --------------------------------------------------
 df["Title"] = df["Title"].fillna("")
 df["Abstract"] = df["Abstract"].fillna("")
-df["Journal"] = df["Journal"].fillna("Unknown")
+df["Journal"] = with_category(df["Journal"], "Unknown").fillna("Unknown")
 
 df["Title_raw"] = df["Title"]
 df["Abstract_raw"] = df["Abstract"]
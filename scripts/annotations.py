@@ -0,0 +1,49 @@
+"""
+Move manual annotations between data/manual_annotations.sqlite (used by
+0_0_8_Manual_Annotation_Tool) and the manual_annotation_paper.json layout.
+
+Run from the repository root:
+
+    python -m scripts.annotations export
+    python -m scripts.annotations export -o annotations_backup.json
+    python -m scripts.annotations import data/manual_annotation_paper.json
+
+Import merges into the store; an existing (paper, label) is overwritten.
+"""
+
+import argparse
+import sys
+
+from utils.annotation_store import DB_FILE, LEGACY_FILE, connect, export_json, import_json
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import manual annotations.")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", nargs="?", default=LEGACY_FILE,
+                        help="JSON file to import from")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("-o", "--output", help="export target (default: the JSON path)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # A new store imports the legacy JSON first, so exporting before the
+    # page was ever opened does not overwrite it with nothing.
+    conn = connect(args.db)
+
+    if args.action == "export":
+        output = args.output or args.path
+        annotations = export_json(conn, output)
+        n_labels = sum(len(labels) for labels in annotations.values())
+        print(f"✅ exported {n_labels} annotations for {len(annotations)} papers "
+              f"to {output}", file=sys.stderr)
+    else:
+        n_labels = import_json(conn, args.path)
+        print(f"✅ imported {n_labels} annotations from {args.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Pack data/ocr_pdf/<paper>/pages/*.md folders into single-file archives
+(data/ocr_pdf/<paper>.pages), one compressed frame per page.
+
+Run from the repository root:
+
+    python -m scripts.archive_corpus
+    python -m scripts.archive_corpus --remove-folders --codec zlib
+
+Pages, extractors and the annotation tool read archives transparently
+through utils/corpus.py. Folders are kept unless --remove-folders is
+given; then only the pages/ subfolders are removed, after every page has
+been verified against the archive and the folder was re-listed to check
+no page was added or changed while the archive was written.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from functools import partial
+
+from utils.corpus import DATA_DIR, archive_paper, file_sha1, list_papers, page_stats
+from utils.page_archive import PageArchive
+from utils.parallel import default_workers, run_parallel
+
+
+def archive_one(paper, data_dir, codec, remove_folder):
+    """
+    Returns (paper, folder_bytes, archive_bytes, problem), where ``problem``
+    says why the folder was kept, or is None.
+    """
+    pages_path = os.path.join(data_dir, paper, "pages")
+    if not os.path.isdir(pages_path):
+        return paper, 0, 0, None
+
+    stats = page_stats(paper, data_dir)
+
+    folder_bytes = sum(
+        os.path.getsize(os.path.join(pages_path, f)) for f in os.listdir(pages_path)
+    )
+
+    path = archive_paper(paper, data_dir, codec)
+    archive = PageArchive(path)
+
+    verified = all(
+        archive.sha1(name) == file_sha1(os.path.join(pages_path, name))
+        for name in archive.page_names
+    )
+
+    problem = None if verified else "verification failed"
+
+    if remove_folder and verified:
+        # A page written after archive_paper listed the folder would be
+        # lost with it; re-list right before removing.
+        current = page_stats(paper, data_dir)
+        if current != stats or [name for name, _, _ in current] != sorted(archive.page_names):
+            problem = "pages changed while archiving"
+        else:
+            # Only the pages go; images/ and other assets stay with the paper.
+            shutil.rmtree(pages_path)
+            folder = os.path.join(data_dir, paper)
+            if not [f for f in os.listdir(folder) if not f.startswith(".")]:
+                shutil.rmtree(folder)
+
+    return paper, folder_bytes, os.path.getsize(path), problem
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Archive OCR page folders.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--papers", nargs="*")
+    parser.add_argument("--codec", choices=["zstd", "zlib"],
+                        help="default: zstd when installed, else zlib")
+    parser.add_argument("--remove-folders", action="store_true")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    papers = args.papers or list_papers(args.data_dir)
+
+    results = run_parallel(
+        partial(
+            archive_one,
+            data_dir=args.data_dir,
+            codec=args.codec,
+            remove_folder=args.remove_folders,
+        ),
+        papers,
+        workers=args.workers,
+    )
+
+    before = after = 0
+    for paper, folder_bytes, archive_bytes, problem in results:
+        if not folder_bytes:
+            continue
+        before += folder_bytes
+        after += archive_bytes
+        if problem:
+            print(f"⚠️ {problem}, folder kept: {paper}", file=sys.stderr)
+
+    print(f"✅ {before / 1e6:.2f} MB of pages -> {after / 1e6:.2f} MB of archives",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark the section splitters on synthetic OCR corpora
+(utils/synthetic_corpus.py) of increasing size.
+
+Run from the repository root:
+
+    python -m scripts.bench_splitters
+    python -m scripts.bench_splitters --pages 10 1000 100000 -o bench/splitters.json
+    python -m scripts.bench_splitters --compare bench/splitters.json
+
+For each corpus size and splitter it reports throughput (MB/s of UTF-8
+text) and the tracemalloc peak of the largest paper. A scaling pass then
+times every splitter on one paper repeated 1x..16x and fits the growth
+exponent. Anything above --max-exponent (catastrophic backtracking,
+quadratic slicing) makes the run exit with status 1.
+
+--keep DIR writes the generated corpus in the data/ocr_pdf layout, so
+other tools can be pointed at it with --data-dir.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from utils.corpus import list_papers, read_page
+from utils.sections import (
+    extract_section,
+    split_by_custom_headers,
+    split_sections,
+    split_sections_with_others,
+)
+from utils.synthetic_corpus import SECTIONS, write_corpus
+
+CUSTOM_HEADERS = ["Abstract"] + SECTIONS + ["References"]
+
+
+def build_splitters(label_config):
+    return {
+        "split_sections_with_others": split_sections_with_others,
+        "split_sections": lambda text: split_sections(text, label_config),
+        "extract_section": lambda text: [
+            extract_section(text, [keyword])
+            for keyword in ("abstract", "introduction", "literature review")
+        ],
+        "split_by_custom_headers": lambda text: split_by_custom_headers(text, CUSTOM_HEADERS),
+    }
+
+
+def load_texts(data_dir):
+    # Same layout as utils.corpus.pack_paper: every page followed by "\n".
+    texts = []
+    for paper in list_papers(data_dir):
+        pages_path = os.path.join(data_dir, paper, "pages")
+        texts.append("".join(
+            read_page(paper, name, data_dir) + "\n"
+            for name in sorted(os.listdir(pages_path))
+        ))
+    return texts
+
+
+# --------------------------------------------------
+# Measurements
+# --------------------------------------------------
+
+def throughput(func, texts):
+    n_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    elapsed = time.perf_counter() - start
+    return n_bytes, elapsed
+
+
+def peak_memory(func, text):
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def best_time(func, text, rounds=3):
+    best = math.inf
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scaling_exponent(func, text, factors=(1, 2, 4, 8, 16)):
+    """Least-squares slope of log(time) against log(input size)."""
+    xs = [math.log(f) for f in factors]
+    ys = [math.log(max(best_time(func, text * f), 1e-9)) for f in factors]
+
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return (
+        sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+        / sum((x - mean_x) ** 2 for x in xs)
+    )
+
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the section splitters.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000],
+                        help="corpus sizes in pages")
+    parser.add_argument("--pages-per-paper", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", default="data/label_code.json",
+                        help="label config for split_sections")
+    parser.add_argument("--max-exponent", type=float, default=1.3)
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--keep", help="write the largest corpus here instead of a temp dir")
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    return parser.parse_args(argv)
+
+
+def compare(results, path):
+    with open(path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+
+    before = {(r["pages"], r["splitter"]): r["mb_per_s"] for r in previous["runs"]}
+
+    print("\nchange vs", path)
+    for run in results["runs"]:
+        old = before.get((run["pages"], run["splitter"]))
+        if old:
+            print(f"{run['pages']:>8} pages  {run['splitter']:<28} "
+                  f"{run['mb_per_s'] / old:6.2f}x")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        splitters = build_splitters(json.load(f))
+
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "pages_per_paper": args.pages_per_paper,
+        "runs": [],
+        "scaling": {},
+    }
+
+    sample = None
+
+    for total_pages in sorted(args.pages):
+        keep = args.keep and total_pages == max(args.pages)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = args.keep if keep else tmp
+            write_corpus(data_dir, total_pages, args.pages_per_paper, args.seed)
+            texts = load_texts(data_dir)
+
+        largest = max(texts, key=len)
+        sample = sample or largest
+
+        for name, func in splitters.items():
+            n_bytes, elapsed = throughput(func, texts)
+            run = {
+                "pages": total_pages,
+                "papers": len(texts),
+                "mb": round(n_bytes / 1e6, 3),
+                "splitter": name,
+                "seconds": round(elapsed, 4),
+                "mb_per_s": round(n_bytes / elapsed / 1e6, 2),
+                "peak_mb": round(peak_memory(func, largest) / 1e6, 3),
+            }
+            results["runs"].append(run)
+            print(f"{total_pages:>8} pages  {name:<28} {run['mb_per_s']:8.2f} MB/s"
+                  f"  peak {run['peak_mb']:7.2f} MB")
+
+    print()
+    slow = []
+    for name, func in splitters.items():
+        exponent = scaling_exponent(func, sample)
+        results["scaling"][name] = round(exponent, 3)
+        flag = "  ⚠️ superlinear" if exponent > args.max_exponent else ""
+        print(f"scaling  {name:<28} n^{exponent:.2f}{flag}")
+        if flag:
+            slow.append(name)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+
+    if slow:
+        print(f"❌ superlinear splitters: {', '.join(slow)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare utils/text_metrics.py with the list-building compute_metadata it
+replaced, on the full text of every paper in data/ocr_pdf.
+
+Run from the repository root:
+
+    python -m scripts.bench_text_metrics
+    python -m scripts.bench_text_metrics --repeat 20
+
+Reports wall time and tracemalloc peak for single texts and for a whole
+column, and checks that both implementations agree.
+"""
+
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from utils.corpus import DATA_DIR, list_papers, read_full_text
+from utils.text_metrics import column_metrics, text_metrics
+
+
+def legacy_metadata(text):
+    words = re.findall(r"\b\w+\b", text)
+    sentences = re.split(r"[.!?]+", text)
+
+    return {
+        "word_count": len(words),
+        "sentence_count": len([s for s in sentences if s.strip()]),
+        "char_count": len(text)
+    }
+
+
+def measure(func, *args):
+    # Timed without tracemalloc, which slows allocation-heavy code a lot;
+    # the peak comes from a second, traced run.
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def report(name, elapsed, peak, n_bytes):
+    print(f"{name:<34} {elapsed * 1000:9.1f} ms  {n_bytes / elapsed / 1e6:8.1f} MB/s"
+          f"  peak {peak / 1e6:8.2f} MB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark text metrics.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="concatenate the corpus this many times for the blob test")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    texts = [read_full_text(p, args.data_dir) for p in list_papers(args.data_dir)]
+    if not texts:
+        print("No papers found.", file=sys.stderr)
+        return
+
+    # One large "others"-style blob, then the per-paper column.
+    blob = "\n".join(texts) * args.repeat
+    n_blob = len(blob.encode("utf-8"))
+
+    expected, elapsed, peak = measure(legacy_metadata, blob)
+    report("compute_metadata (lists)", elapsed, peak, n_blob)
+
+    result, elapsed, peak = measure(text_metrics, blob)
+    report("text_metrics (streaming)", elapsed, peak, n_blob)
+    assert result == expected
+
+    column = pd.Series(texts * args.repeat)
+    n_column = sum(len(t.encode("utf-8")) for t in column)
+
+    expected, elapsed, peak = measure(
+        lambda s: pd.DataFrame([legacy_metadata(t) for t in s]), column
+    )
+    report("compute_metadata per row", elapsed, peak, n_column)
+
+    result, elapsed, peak = measure(column_metrics, column)
+    report("column_metrics", elapsed, peak, n_column)
+    assert (result.values == expected[list(result.columns)].values).all()
+
+    print("✅ results identical", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Headless section extraction over data/ocr_pdf, without Streamlit.
+
+Run from the repository root:
+
+    python -m scripts.extract_sections labels > sections.jsonl
+    python -m scripts.extract_sections dynamic --config data/label_code.json
+    python -m scripts.extract_sections cluster-text --format json -o data/cluster_journal_text.json
+    python -m scripts.extract_sections custom --headers headers.txt -o segments.jsonl
+    python -m scripts.extract_sections labels --format parquet -o data/cluster_journal_label
+    python -m scripts.extract_sections dynamic --format parquet -o data/cluster_journal_dynamic
+    python -m scripts.extract_sections auto --min-score 0.6 -o auto.jsonl
+
+Modes mirror the pages:
+    labels        split_sections_with_others  (0_0_4 -> cluster_journal_label/)
+    dynamic       split_sections + label_code  (0_0_7 -> cluster_journal_dynamic/)
+    cluster-text  extract_section              (0_0_3 -> cluster_journal_text.json)
+    custom        split_by_custom_headers      (0_0_10 -> approved_segments.jsonl)
+    auto          closest approved template    (0_0_10 auto-segmentation)
+
+Records are written as they are produced (JSONL by default), so memory
+stays bounded regardless of corpus size. ``--format json`` streams the
+JSON layout of the other pages instead, and ``--format parquet`` writes
+one Parquet file per paper into the -o directory, as 0_0_4 and 0_0_7 do
+(utils/section_store.py), together with the same _manifest.json, so the
+pages (and later runs) only re-extract papers that changed. Sections are [start, end, first_page,
+last_page] spans into the paper's full text, recorded with the text's
+fingerprint; utils.sections.materialise turns them back into text and
+read_spans decodes only the covered pages.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from functools import partial
+
+from utils.corpus import DATA_DIR, list_papers
+from utils.fileio import atomic_open
+from utils.header_templates import MIN_SCORE, auto_segment, build_templates
+from utils.manifest import update_partitioned_output
+from utils.parallel import default_workers, imap_ordered
+from utils.segment_store import get_segment_store
+from utils.sections import (
+    DYNAMIC_EXTRACTOR,
+    LABELS_EXTRACTOR,
+    parse_cluster_text,
+    parse_custom_segments,
+    parse_dynamic_sections,
+    parse_labeled_sections,
+)
+
+
+# --------------------------------------------------
+# Record producers
+# --------------------------------------------------
+
+def build_worker(args):
+    """
+    Return (worker, one_per_paper, label_version). Workers either yield a
+    list of section rows per paper, or one record per paper when
+    ``one_per_paper`` is set. ``label_version`` is the hash of the label
+    config the worker uses, as recorded in a Parquet output's manifest.
+    """
+    if args.mode == "labels":
+        return partial(parse_labeled_sections, data_dir=args.data_dir), False, None
+
+    if args.mode == "dynamic":
+        with open(args.config, "rb") as f:
+            data = f.read()
+        worker = partial(
+            parse_dynamic_sections,
+            label_config=json.loads(data),
+            data_dir=args.data_dir,
+        )
+        return worker, False, hashlib.sha1(data).hexdigest()
+
+    if args.mode == "cluster-text":
+        return partial(parse_cluster_text, data_dir=args.data_dir), True, None
+
+    if args.mode == "auto":
+        templates = build_templates(get_segment_store(args.approved).load_all())
+        worker = partial(
+            auto_segment,
+            templates=templates,
+            min_score=args.min_score,
+            data_dir=args.data_dir,
+        )
+        return worker, True, None
+
+    with open(args.headers, "r", encoding="utf-8") as f:
+        header_lines = f.read().split("\n")
+
+    worker = partial(
+        parse_custom_segments,
+        header_lines=header_lines,
+        data_dir=args.data_dir,
+    )
+    return worker, True, None
+
+
+# --------------------------------------------------
+# Writers
+# --------------------------------------------------
+
+def write_jsonl(records, out):
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def write_json(records, out, keyed):
+    """
+    Stream a JSON document without holding it in memory: a list of rows,
+    or, for custom segments, the {journal_name: segments} mapping.
+    """
+    out.write("{" if keyed else "[")
+    count = 0
+
+    for record in records:
+        out.write(",\n" if count else "\n")
+        if keyed:
+            out.write(json.dumps(record["journal_name"], ensure_ascii=False))
+            out.write(": ")
+            out.write(json.dumps(record["segments"], ensure_ascii=False))
+        else:
+            out.write(json.dumps(record, ensure_ascii=False))
+        count += 1
+
+    out.write("\n}\n" if keyed else "\n]\n")
+    return count
+
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract journal sections from data/ocr_pdf without Streamlit."
+    )
+    parser.add_argument("mode", choices=["labels", "dynamic", "cluster-text", "custom", "auto"])
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--config", default="data/label_code.json",
+                        help="label config for the dynamic mode")
+    parser.add_argument("--headers",
+                        help="file with one header line per row (custom mode)")
+    parser.add_argument("--approved", default="data/approved_segments.jsonl",
+                        help="approved segmentations to learn templates from (auto mode)")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE,
+                        help="share of template headers a paper must contain (auto mode)")
+    parser.add_argument("--papers", nargs="*",
+                        help="only process these paper folders")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--format", choices=["jsonl", "json", "parquet"], default="jsonl")
+    parser.add_argument("-o", "--output",
+                        help="output path (default: stdout)")
+
+    args = parser.parse_args(argv)
+
+    if args.mode == "custom" and not args.headers:
+        parser.error("custom mode needs --headers")
+
+    if args.format == "parquet" and (
+        args.mode not in ("labels", "dynamic") or not args.output
+    ):
+        parser.error("--format parquet needs labels or dynamic mode and -o DIR")
+
+    if args.format == "parquet" and args.papers:
+        parser.error("--format parquet keeps a manifest of the whole corpus; drop --papers")
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    worker, one_per_paper, label_version = build_worker(args)
+
+    if args.format == "parquet":
+        # Same manifest and extractor tags as the pages, so only new or
+        # changed papers are extracted and the pages trust the result.
+        changed, removed = update_partitioned_output(
+            args.output,
+            worker,
+            extractor=LABELS_EXTRACTOR if args.mode == "labels" else DYNAMIC_EXTRACTOR,
+            label_version=label_version,
+            data_dir=args.data_dir,
+            workers=args.workers,
+        )
+        print(
+            f"✅ {len(changed)} papers extracted, {len(removed)} removed",
+            file=sys.stderr
+        )
+        return
+
+    papers = args.papers or list_papers(args.data_dir)
+    results = imap_ordered(worker, papers, workers=args.workers)
+
+    if one_per_paper:
+        records = results
+    else:
+        records = (row for rows in results for row in rows)
+
+    def write(out):
+        if args.format == "jsonl":
+            return write_jsonl(records, out)
+        return write_json(records, out, keyed=args.mode == "custom")
+
+    if not args.output:
+        count = write(sys.stdout)
+    else:
+        # Write next to the target and swap in, so readers never see a
+        # half-written file.
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with atomic_open(args.output, "w") as out:
+            count = write(out)
+
+    print(f"✅ {count} records from {len(papers)} papers", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Extract per-page text from new PDFs in data/pdf into
+data/ocr_pdf/<name>_pdf/pages/page_NNNN.md, one worker process per PDF.
+
+Run from the repository root:
+
+    python -m scripts.ingest_pdfs
+    python -m scripts.ingest_pdfs --workers 8 --status
+
+Interrupted runs resume from the last page written. Folders produced by
+the external OCR step are left alone unless --force is given. A PDF that
+cannot be read is reported and skipped; the rest are still ingested.
+"""
+
+import argparse
+import sys
+from functools import partial
+
+from utils.corpus import DATA_DIR
+from utils.ingest import PDF_DIR, ingest_status, list_pdfs, pending_pdfs, try_ingest_pdf
+from utils.parallel import default_workers, run_parallel
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest data/pdf into page markdown.")
+    parser.add_argument("--pdf-dir", default=PDF_DIR)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--force", action="store_true",
+                        help="also re-extract folders produced by external OCR")
+    parser.add_argument("--status", action="store_true",
+                        help="only print the ingestion status of every PDF")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.status:
+        for pdf in list_pdfs(args.pdf_dir):
+            print(f"{ingest_status(pdf, args.data_dir):>8}  {pdf}")
+        return
+
+    pdfs = pending_pdfs(args.pdf_dir, args.data_dir, force=args.force)
+
+    if not pdfs:
+        print("Nothing to ingest.", file=sys.stderr)
+        return
+
+    def report(done, total):
+        print(f"  {done}/{total} PDFs", file=sys.stderr)
+
+    results = run_parallel(
+        partial(try_ingest_pdf, data_dir=args.data_dir),
+        pdfs,
+        workers=args.workers,
+        progress=report,
+    )
+
+    failed = [(pdf, error) for pdf, (_, _, _, error) in zip(pdfs, results) if error]
+    pages = sum(written for _, written, _, _ in results)
+    print(
+        f"✅ Ingested {len(results) - len(failed)} PDFs ({pages} pages written)",
+        file=sys.stderr
+    )
+
+    if failed:
+        print(f"❌ {len(failed)} PDFs failed:", file=sys.stderr)
+        for pdf, error in failed:
+            print(f"  {pdf}: {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Update the full-text index in data/ocr_pack/search.sqlite and optionally
+run a query against it.
+
+Run from the repository root:
+
+    python -m scripts.search_corpus
+    python -m scripts.search_corpus --query '"life cycle assessment"' --limit 20
+
+Only papers whose pages changed since the last run are re-indexed.
+"""
+
+import argparse
+import sys
+import time
+
+from utils.corpus import DATA_DIR, PACK_DIR
+from utils.parallel import default_workers
+from utils.search_index import index_summary, search, update_index
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Full-text search over OCR pages.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--pack-dir", default=PACK_DIR)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--query")
+    parser.add_argument("--limit", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    changed, removed = update_index(args.data_dir, args.pack_dir, workers=args.workers)
+    n_papers, n_pages = index_summary(args.pack_dir)
+    print(f"✅ indexed {len(changed)} papers, dropped {len(removed)} "
+          f"({n_papers} papers, {n_pages} pages in index)", file=sys.stderr)
+
+    if not args.query:
+        return
+
+    start = time.perf_counter()
+    hits = search(args.query, limit=args.limit, pack_dir=args.pack_dir)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for h in hits:
+        offsets = " ".join(f"{s}-{e}" for s, e in h["offsets"][:5])
+        print(f"{h['score']:8.3f}  {h['paper']}  {h['page']}  {offsets}")
+
+    print(f"{len(hits)} hits in {elapsed:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
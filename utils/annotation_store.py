@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.manifest import save_json_atomic
+
+# Manual annotations in SQLite (data/manual_annotations.sqlite), one row per
+# (paper, label). The value column holds the JSON the old
+# data/manual_annotation_paper.json held for that label: a span list, or
+# plain text for annotations saved before offsets were stored. Span
+# annotations also record the text fingerprint of the paper they point
+# into (PackedPaper.fingerprint), so a later change to the paper's pages
+# shows up as stale labels instead of wrong text.
+#
+# The database runs in WAL mode, so annotators on the same server read
+# while another one saves, and a save only touches its own row. Pages
+# query the selected paper's rows through the (paper, label) key instead
+# of loading every annotation.
+#
+# The page keeps one connection per process (st.cache_resource, opened
+# with check_same_thread=False) shared by every session; writes through
+# it take _write_lock so two sessions' transactions never interleave.
+# The schema migration runs on the first connect to a path per process.
+
+DB_FILE = "data/manual_annotations.sqlite"
+LEGACY_FILE = "data/manual_annotation_paper.json"
+
+SCHEMA_VERSION = 2
+
+# paths whose schema this process has already checked
+_migrated = set()
+
+_write_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS annotations (
+    paper TEXT NOT NULL,
+    label TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated REAL NOT NULL,
+    fingerprint TEXT,
+    PRIMARY KEY (paper, label)
+);
+"""
+
+
+def connect(path=DB_FILE, legacy_file=LEGACY_FILE, check_same_thread=True):
+    """Open the store, creating it (and importing ``legacy_file``) on first use."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    key = os.path.abspath(path)
+    if key in _migrated:
+        return conn
+
+    conn.executescript(_SCHEMA)
+
+    with conn:
+        # BEGIN IMMEDIATE so two first-time connections cannot both import.
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            if version < 1 and legacy_file and os.path.exists(legacy_file):
+                _import(conn, legacy_file)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(annotations)")}
+            if "fingerprint" not in columns:
+                conn.execute("ALTER TABLE annotations ADD COLUMN fingerprint TEXT")
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    _migrated.add(key)
+    return conn
+
+
+# --------------------------------------------------
+# Reading + writing
+# --------------------------------------------------
+
+def load_annotations(conn, paper):
+    """{label: value} for one paper, in the order labels were first saved."""
+    rows = conn.execute(
+        "SELECT label, value FROM annotations WHERE paper = ? ORDER BY rowid",
+        (paper,)
+    )
+    return {label: json.loads(value) for label, value in rows}
+
+
+def stale_labels(conn, paper, fingerprint):
+    """Labels of ``paper`` whose spans were taken from other text than ``fingerprint``."""
+    rows = conn.execute(
+        """
+        SELECT label FROM annotations
+        WHERE paper = ? AND fingerprint IS NOT NULL AND fingerprint != ?
+        ORDER BY rowid
+        """,
+        (paper, fingerprint)
+    )
+    return [label for (label,) in rows]
+
+
+def paper_stamp(conn, paper):
+    """Changes whenever any annotation of ``paper`` is saved or removed."""
+    return conn.execute(
+        "SELECT count(*), max(updated) FROM annotations WHERE paper = ?",
+        (paper,)
+    ).fetchone()
+
+
+def save_annotation(conn, paper, label, value, fingerprint=None):
+    """
+    Insert or replace one annotation; ``fingerprint`` is the text the
+    value's spans point into. Returns True if it replaced one.
+    """
+    with _write_lock, conn:
+        replaced = conn.execute(
+            "SELECT 1 FROM annotations WHERE paper = ? AND label = ?",
+            (paper, label)
+        ).fetchone() is not None
+        conn.execute(
+            """
+            INSERT INTO annotations (paper, label, value, updated, fingerprint)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (paper, label)
+            DO UPDATE SET value = excluded.value, updated = excluded.updated,
+                          fingerprint = excluded.fingerprint
+            """,
+            (paper, label, json.dumps(value, separators=(",", ":")), time.time(),
+             fingerprint)
+        )
+    return replaced
+
+
+def delete_annotation(conn, paper, label):
+    with _write_lock, conn:
+        conn.execute(
+            "DELETE FROM annotations WHERE paper = ? AND label = ?",
+            (paper, label)
+        )
+
+
+# --------------------------------------------------
+# JSON import / export
+# --------------------------------------------------
+
+def _import(conn, path):
+    with open(path, "r", encoding="utf-8") as f:
+        annotations = json.load(f)
+
+    now = time.time()
+    conn.executemany(
+        """
+        INSERT INTO annotations (paper, label, value, updated)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (paper, label)
+        DO UPDATE SET value = excluded.value, updated = excluded.updated,
+                      fingerprint = NULL
+        """,
+        [
+            (paper, label, json.dumps(value, separators=(",", ":")), now)
+            for paper, labels in annotations.items()
+            for label, value in labels.items()
+        ]
+    )
+    return sum(len(labels) for labels in annotations.values())
+
+
+def import_json(conn, path=LEGACY_FILE):
+    """Merge a {paper: {label: value}} JSON file into the store."""
+    with _write_lock, conn:
+        return _import(conn, path)
+
+
+def export_json(conn, path=LEGACY_FILE):
+    """Write every annotation back out in the manual_annotation_paper.json layout."""
+    annotations = {}
+    for paper, label, value in conn.execute(
+        "SELECT paper, label, value FROM annotations ORDER BY paper, rowid"
+    ):
+        annotations.setdefault(paper, {})[label] = json.loads(value)
+
+    save_json_atomic(path, annotations, indent=4)
+    return annotations
@@ -0,0 +1,208 @@
+import json
+import os
+
+from utils.fileio import atomic_write, file_lock
+
+# Parsed literature-review batches (pages 1 and 2) as JSON lines in
+# data/parsed_literature.jsonl, one batch per line, plus a side index
+# data/parsed_literature.index.jsonl with one line per batch:
+#
+#   {"batch_id", "created_at", "offset", "length", "sections", "citations",
+#    "bibliography"}
+#
+# Saving appends a line to each file, whatever the number of batches. The
+# browser lists batches from the index and reads a selected batch with one
+# seek. The index can always be rebuilt from the data file, and is when it
+# is missing or lags behind it (a save interrupted between the two
+# appends).
+#
+# A legacy data/parsed_literature.json (one list rewritten per save) is
+# imported on first use and left in place.
+
+# path -> (stamp, entries), reused across Streamlit reruns
+_indexes = {}
+
+
+def index_path(path):
+    root, _ = os.path.splitext(str(path))
+    return root + ".index.jsonl"
+
+
+def legacy_path(path):
+    root, _ = os.path.splitext(str(path))
+    return root + ".json"
+
+
+def _encode(obj):
+    return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _entry(batch, offset, length):
+    return {
+        "batch_id": batch.get("batch_id", "unknown"),
+        "created_at": batch.get("created_at"),
+        "offset": offset,
+        "length": length,
+        "sections": len(batch.get("sections", [])),
+        "citations": len(batch.get("citations", [])),
+        "bibliography": len(batch.get("bibliography", [])),
+    }
+
+
+# --------------------------------------------------
+# Index maintenance (callers hold the lock)
+# --------------------------------------------------
+
+def _read_index_file(path):
+    entries = []
+    if not os.path.exists(index_path(path)):
+        return entries
+    with open(index_path(path), "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+    return entries
+
+
+def _indexed_end(path):
+    """End offset of the last indexed batch, reading only the index tail."""
+    idx = index_path(path)
+    if not os.path.exists(idx):
+        return None
+    with open(idx, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return 0
+        f.seek(max(0, size - 4096))
+        tail = f.read()
+    if not tail.endswith(b"\n"):
+        return None
+    try:
+        last = json.loads(tail.rsplit(b"\n", 2)[-2])
+    except ValueError:
+        return None
+    return last["offset"] + last["length"]
+
+
+def _scan(path, offset=0):
+    """Index entries for complete lines of the data file from ``offset``."""
+    entries = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            entries.append(_entry(json.loads(line), offset, len(line)))
+            offset += len(line)
+    return entries, offset
+
+
+def _repair(path):
+    """Bring the index in line with the data file; drop a torn last line."""
+    entries = _read_index_file(path)
+    indexed = entries[-1]["offset"] + entries[-1]["length"] if entries else 0
+
+    if indexed > os.path.getsize(path):
+        entries, indexed = [], 0
+
+    missing, end = _scan(path, indexed)
+    entries += missing
+    atomic_write(index_path(path), b"".join(_encode(e) for e in entries))
+
+    if os.path.getsize(path) > end:
+        with open(path, "r+b") as f:
+            f.truncate(end)
+
+    return entries
+
+
+def _migrate(path):
+    legacy = legacy_path(path)
+    if os.path.exists(path) or not os.path.exists(legacy):
+        return
+    if os.path.getsize(legacy) == 0:
+        return
+    with open(legacy, "r", encoding="utf-8") as f:
+        batches = json.load(f)
+    atomic_write(str(path), b"".join(_encode(b) for b in batches))
+
+
+def _ensure(path):
+    with file_lock(str(path)):
+        _migrate(path)
+        if os.path.exists(path):
+            _repair(path)
+
+
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+
+def append_batch(batch, path):
+    """Append one batch record and its index entry."""
+    path = str(path)
+    line = _encode(batch)
+
+    with file_lock(path):
+        _migrate(path)
+        if os.path.exists(path) and _indexed_end(path) != os.path.getsize(path):
+            _repair(path)
+
+        with open(path, "ab") as f:
+            offset = f.tell()
+            f.write(line)
+        with open(index_path(path), "ab") as f:
+            f.write(_encode(_entry(batch, offset, len(line))))
+
+
+def list_batches(path):
+    """Index entries of every stored batch, oldest first."""
+    path = str(path)
+    idx = index_path(path)
+
+    if not os.path.exists(idx):
+        _ensure(path)
+        if not os.path.exists(idx):
+            return []
+
+    stat = os.stat(idx)
+    stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _indexes.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    entries = _read_index_file(path)
+
+    # A save interrupted between the two appends leaves the index short.
+    indexed = entries[-1]["offset"] + entries[-1]["length"] if entries else 0
+    if os.path.exists(path) and os.path.getsize(path) != indexed:
+        _ensure(path)
+        return list_batches(path)
+
+    _indexes[path] = (stamp, entries)
+    return entries
+
+
+def read_batch(entry, path):
+    """Load the batch an index entry points to."""
+    with open(str(path), "rb") as f:
+        f.seek(entry["offset"])
+        return json.loads(f.read(entry["length"]))
+
+
+def read_batches(path, entries=None):
+    """Load several batches (all of them by default), in index order."""
+    entries = list_batches(path) if entries is None else entries
+    if not entries:
+        return []
+    with open(str(path), "rb") as f:
+        batches = []
+        for entry in entries:
+            f.seek(entry["offset"])
+            batches.append(json.loads(f.read(entry["length"])))
+    return batches
@@ -0,0 +1,228 @@
+import os
+import threading
+
+from utils.corpus import (
+    ARCHIVE_SUFFIX,
+    DATA_DIR,
+    archive_path,
+    is_ingesting,
+    page_stats,
+    scan_papers,
+)
+
+# In-process catalog of papers and pages that is kept current by a
+# background watcher, so Streamlit reruns never scan the filesystem.
+#
+# The watcher uses watchdog (inotify/FSEvents) when it is installed and
+# falls back to polling. ``version`` is bumped only when the corpus or one
+# of the watched config files actually changed; cached loaders take it as
+# an argument so they reload exactly when the data moves.
+#
+# A poll only stats the corpus folder, each paper's pages folder (or
+# archive) and the watched files. The paper list is re-read when the
+# corpus folder's mtime moved, and a paper's pages are re-stat'ed only when
+# its folder mtime moved or watchdog reported an event under it. Pages are
+# written by temp file + rename, which always moves the folder mtime; call
+# refresh(full=True) after editing a page in place. Folders still being
+# ingested (utils/ingest.py) are left out, and re-checked every poll until
+# their marker is gone. While nothing changes the poll interval doubles,
+# up to MAX_POLL_INTERVAL.
+#
+# get_catalog also stats the corpus folder and the watched files on every
+# call (every page rerun), so new papers and config edits show up on the
+# next rerun even between polls.
+
+WATCHED_FILES = ("data/label_code.json", "data/cluster.json")
+
+POLL_INTERVAL = 2.0
+POLL_INTERVAL_WITH_EVENTS = 30.0
+MAX_POLL_INTERVAL = 10.0
+
+# data_dir -> CorpusCatalog
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _paper_stamp(paper, data_dir):
+    return (
+        _file_stamp(os.path.join(data_dir, paper, "pages")),
+        _file_stamp(archive_path(paper, data_dir)),
+    )
+
+
+class CorpusCatalog:
+
+    def __init__(self, data_dir=DATA_DIR, watched_files=WATCHED_FILES):
+        self.data_dir = data_dir
+        self.watched_files = tuple(watched_files)
+        self.version = 0
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._dirty = set()
+        self._snapshot = self._scan()
+
+        self._observer = self._start_observer()
+        interval = POLL_INTERVAL_WITH_EVENTS if self._observer else POLL_INTERVAL
+
+        thread = threading.Thread(
+            target=self._watch, args=(interval,), name="corpus-catalog", daemon=True
+        )
+        thread.start()
+
+    # ----------------------------------------------
+    # Scanning
+    # ----------------------------------------------
+
+    def _scan(self, previous=None, dirty=()):
+        root = _file_stamp(self.data_dir)
+        if (previous is not None and previous["root"] == root
+                and all(is_ingesting(p, self.data_dir) for p in previous["ingesting"])):
+            papers = list(previous["pages"])
+            ingesting = previous["ingesting"]
+        else:
+            papers, ingesting = scan_papers(self.data_dir)
+            papers = sorted(papers)
+
+        stamps = {}
+        pages = {}
+        for paper in papers:
+            stamp = _paper_stamp(paper, self.data_dir)
+            if (previous is not None and paper not in dirty
+                    and previous["stamps"].get(paper) == stamp):
+                pages[paper] = previous["pages"][paper]
+            else:
+                pages[paper] = tuple(page_stats(paper, self.data_dir))
+            stamps[paper] = stamp
+
+        files = {path: _file_stamp(path) for path in self.watched_files}
+        return {
+            "root": root,
+            "stamps": stamps,
+            "pages": pages,
+            "ingesting": ingesting,
+            "files": files,
+        }
+
+    def refresh(self, full=False):
+        """Rescan now (every paper when ``full``); returns True when something changed."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        previous = None if full else self._snapshot
+
+        try:
+            snapshot = self._scan(previous, dirty)
+        except OSError:
+            with self._lock:
+                self._dirty |= dirty
+            raise
+
+        with self._lock:
+            if (snapshot["pages"] == self._snapshot["pages"]
+                    and snapshot["files"] == self._snapshot["files"]):
+                self._snapshot = snapshot
+                return False
+            self._snapshot = snapshot
+            self.version += 1
+            return True
+
+    def _watch(self, interval):
+        delay = interval
+        while True:
+            woken = self._wake.wait(delay)
+            self._wake.clear()
+            try:
+                changed = self.refresh()
+            except OSError:
+                # A paper vanished mid-scan; the next pass settles it.
+                changed = True
+            if changed or woken:
+                delay = interval
+            else:
+                delay = min(delay * 2, max(interval, MAX_POLL_INTERVAL))
+
+    def check(self):
+        """Rescan now if the corpus folder or a watched file moved since the last scan."""
+        snapshot = self._snapshot
+        if _file_stamp(self.data_dir) == snapshot["root"] and all(
+            _file_stamp(path) == stamp for path, stamp in snapshot["files"].items()
+        ):
+            return False
+        # Also resets the watcher's back-off.
+        self._wake.set()
+        try:
+            return self.refresh()
+        except OSError:
+            return False
+
+    def _mark_dirty(self, path):
+        rel = os.path.relpath(path, self.data_dir)
+        if rel.startswith(os.pardir) or rel == os.curdir:
+            return
+        paper = rel.split(os.sep, 1)[0]
+        if paper.endswith(ARCHIVE_SUFFIX):
+            paper = paper[:-len(ARCHIVE_SUFFIX)]
+        with self._lock:
+            self._dirty.add(paper)
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        catalog = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if path:
+                        catalog._mark_dirty(os.fsdecode(path))
+                catalog._wake.set()
+
+        observer = Observer()
+        handler = Handler()
+
+        if os.path.isdir(self.data_dir):
+            observer.schedule(handler, self.data_dir, recursive=True)
+
+        for folder in {os.path.dirname(p) or "." for p in self.watched_files}:
+            if os.path.isdir(folder):
+                observer.schedule(handler, folder, recursive=False)
+
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    # ----------------------------------------------
+    # Queries
+    # ----------------------------------------------
+
+    def papers(self):
+        return list(self._snapshot["pages"])
+
+    def page_stats(self, paper):
+        return list(self._snapshot["pages"].get(paper, ()))
+
+    def page_names(self, paper):
+        return [name for name, _, _ in self.page_stats(paper)]
+
+
+def get_catalog(data_dir=DATA_DIR):
+    with _catalogs_lock:
+        catalog = _catalogs.get(data_dir)
+        if catalog is None:
+            catalog = CorpusCatalog(data_dir)
+            _catalogs[data_dir] = catalog
+            return catalog
+    catalog.check()
+    return catalog
@@ -0,0 +1,354 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from utils.fileio import atomic_open, atomic_write
+from utils.page_archive import open_archive, write_archive
+
+DATA_DIR = "data/ocr_pdf"
+PACK_DIR = "data/ocr_pack"
+
+# A paper is either a folder <paper>/pages/*.md or a single compressed
+# archive <paper>.pages next to the folders (see utils/page_archive.py).
+# When both exist the folder wins.
+ARCHIVE_SUFFIX = ".pages"
+
+# Written into a paper folder while utils/ingest.py is still extracting
+# its pages; such folders are not listed as papers until it is removed.
+PARTIAL_MARKER = ".ingest.partial.json"
+
+# (paper, data_dir, pack_dir) -> PackedPaper, reused across Streamlit
+# reruns. Each open pack holds an mmap and so a file descriptor; the
+# least recently used packs are closed beyond MAX_OPEN_PACKS.
+_open_packs = OrderedDict()
+_open_packs_lock = threading.Lock()
+MAX_OPEN_PACKS = 64
+
+
+# --------------------------------------------------
+# Paper / page discovery
+# --------------------------------------------------
+
+def archive_path(paper, data_dir=DATA_DIR):
+    return os.path.join(data_dir, paper + ARCHIVE_SUFFIX)
+
+
+def _pages_dir(paper, data_dir):
+    return os.path.join(data_dir, paper, "pages")
+
+
+def is_ingesting(paper, data_dir=DATA_DIR):
+    return os.path.exists(os.path.join(data_dir, paper, PARTIAL_MARKER))
+
+
+def scan_papers(data_dir=DATA_DIR):
+    """(papers, ingesting): paper names, and folders still being ingested."""
+    papers = set()
+    ingesting = set()
+    if not os.path.isdir(data_dir):
+        return papers, ingesting
+
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                if is_ingesting(entry.name, data_dir):
+                    ingesting.add(entry.name)
+                else:
+                    papers.add(entry.name)
+            elif entry.name.endswith(ARCHIVE_SUFFIX):
+                papers.add(entry.name[:-len(ARCHIVE_SUFFIX)])
+
+    # An archive next to a half-ingested folder is still a paper.
+    return papers, ingesting - papers
+
+
+def list_papers(data_dir=DATA_DIR):
+    return sorted(scan_papers(data_dir)[0])
+
+
+def page_stats(paper, data_dir=DATA_DIR):
+    """
+    Return [(name, mtime_ns, size), ...] for the pages of a paper, in page
+    order, without opening any page. Archived pages carry the archive's
+    mtime and their uncompressed size.
+    """
+    pages_path = _pages_dir(paper, data_dir)
+
+    if os.path.isdir(pages_path):
+        stats = []
+        with os.scandir(pages_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".md") and not entry.name.startswith("."):
+                    st = entry.stat()
+                    stats.append((entry.name, st.st_mtime_ns, st.st_size))
+        return sorted(stats)
+
+    path = archive_path(paper, data_dir)
+    if os.path.isfile(path):
+        mtime_ns = os.stat(path).st_mtime_ns
+        archive = open_archive(path)
+        return sorted(
+            (name, mtime_ns, archive.raw_size(name)) for name in archive.page_names
+        )
+
+    return []
+
+
+def read_page(paper, name, data_dir=DATA_DIR):
+    pages_path = _pages_dir(paper, data_dir)
+
+    if os.path.isdir(pages_path):
+        with open(os.path.join(pages_path, name), "r", encoding="utf-8") as f:
+            return f.read()
+
+    return open_archive(archive_path(paper, data_dir)).read_page(name)
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_sha1(paper, name, data_dir=DATA_DIR):
+    pages_path = _pages_dir(paper, data_dir)
+
+    if not os.path.isdir(pages_path):
+        return open_archive(archive_path(paper, data_dir)).sha1(name)
+
+    return file_sha1(os.path.join(pages_path, name))
+
+
+# --------------------------------------------------
+# Packing
+# --------------------------------------------------
+
+def _pack_paths(paper, pack_dir):
+    base = os.path.join(pack_dir, paper)
+    return base + ".txt", base + ".json"
+
+
+def pack_paper(paper, data_dir=DATA_DIR, pack_dir=PACK_DIR, stats=None):
+    """
+    Concatenate every page of a paper into one UTF-8 text file plus a
+    JSON index of page offsets and the SHA-1 of the text. Each page is
+    followed by "\\n", matching the text the old per-page read_all_pages
+    produced.
+    """
+    if stats is None:
+        stats = page_stats(paper, data_dir)
+
+    chunks = []
+    byte_offsets = [0]
+    char_offsets = [0]
+
+    for name, _, _ in stats:
+        page_text = read_page(paper, name, data_dir) + "\n"
+
+        encoded = page_text.encode("utf-8")
+        chunks.append(encoded)
+        byte_offsets.append(byte_offsets[-1] + len(encoded))
+        char_offsets.append(char_offsets[-1] + len(page_text))
+
+    data = b"".join(chunks)
+
+    index = {
+        "paper": paper,
+        "pages": [list(s) for s in stats],
+        "byte_offsets": byte_offsets,
+        "char_offsets": char_offsets,
+        "sha1": hashlib.sha1(data).hexdigest(),
+    }
+
+    os.makedirs(pack_dir, exist_ok=True)
+    text_path, index_path = _pack_paths(paper, pack_dir)
+
+    # Text first: a reader only trusts the pack once the index matches.
+    atomic_write(text_path, data)
+    atomic_write(index_path, json.dumps(index), mode="w")
+
+    return index
+
+
+def archive_paper(paper, data_dir=DATA_DIR, codec=None):
+    """
+    Write every page of a paper folder into <paper>.pages. The folder is
+    left in place; remove it to make readers use the archive.
+    """
+    pages_path = _pages_dir(paper, data_dir)
+    names = [name for name, _, _ in page_stats(paper, data_dir)]
+
+    def pages():
+        for name in names:
+            with open(os.path.join(pages_path, name), "rb") as f:
+                yield name, f.read()
+
+    path = archive_path(paper, data_dir)
+    with atomic_open(path, "wb") as f:
+        write_archive(f, pages(), codec)
+
+    return path
+
+
+def _load_index(index_path):
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# --------------------------------------------------
+# Memory-mapped access
+# --------------------------------------------------
+
+class PackedPaper:
+    """
+    Read-only view of a packed paper. Page ranges are half-open:
+    ``first`` is included and ``last`` is not. ``fingerprint`` is the
+    SHA-1 of the full text; stored spans carry it so they are never
+    applied to a different version of the text.
+    """
+
+    def __init__(self, paper, index, buffer, text_path=None, index_path=None):
+        self.paper = paper
+        self.index = index
+        self.buffer = buffer
+        self.text_path = text_path
+        self.index_path = index_path
+        self.fingerprint = index["sha1"]
+        self.page_names = [p[0] for p in index["pages"]]
+        self.byte_offsets = index["byte_offsets"]
+        self.char_offsets = index["char_offsets"]
+
+    def __len__(self):
+        return len(self.page_names)
+
+    def close(self):
+        """Release the mmap; a later read maps the pack again if it is unchanged."""
+        if isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:
+                # A memoryview from page_bytes is still alive; the mmap is
+                # released once it goes.
+                pass
+
+    def _view(self):
+        if isinstance(self.buffer, mmap.mmap) and self.buffer.closed:
+            # Closed by open_paper (evicted or replaced) while still held.
+            index = _load_index(self.index_path)
+            if index is None or index.get("sha1") != self.fingerprint:
+                raise ValueError(
+                    f"{self.paper}: the pack was rebuilt; open the paper again."
+                )
+            self.buffer = _map(self.text_path)
+        return memoryview(self.buffer)
+
+    def _bounds(self, first, last):
+        if last is None:
+            last = len(self)
+        first = max(0, min(first, len(self)))
+        last = max(first, min(last, len(self)))
+        return first, last
+
+    def page_bytes(self, first=0, last=None):
+        """Zero-copy memoryview over the UTF-8 bytes of a page range."""
+        first, last = self._bounds(first, last)
+        view = self._view()
+        return view[self.byte_offsets[first]:self.byte_offsets[last]]
+
+    def text(self, first=0, last=None):
+        return str(self.page_bytes(first, last), "utf-8")
+
+    def full_text(self):
+        return self.text()
+
+    def page_range(self, start, end):
+        return page_range(self.char_offsets, start, end)
+
+    def span_text(self, start, end, first=None, last=None):
+        """
+        Characters [start, end) of the full text, decoding only the pages
+        the span falls on. ``first``/``last`` are the span's stored page
+        range, if it has one.
+        """
+        if first is None or last is None:
+            first, last = self.page_range(start, end)
+        offset = self.char_offsets[first]
+        return self.text(first, last)[start - offset:end - offset]
+
+
+def page_range(char_offsets, start, end):
+    """
+    Half-open range [first, last) of the pages that characters
+    [start, end) fall on, from a page's char_offsets table.
+    """
+    n_pages = len(char_offsets) - 1
+    first = max(0, min(bisect_right(char_offsets, start) - 1, n_pages))
+    last = max(first, min(bisect_left(char_offsets, end), n_pages))
+    if last == first and first < n_pages:
+        last = first + 1
+    return first, last
+
+
+def open_paper(paper, data_dir=DATA_DIR, pack_dir=PACK_DIR, stats=None):
+    """
+    Return a PackedPaper, (re)building the pack only when the page
+    files differ from what the index recorded. Pass ``stats`` from the
+    corpus catalog (utils/catalog.py) to skip the directory scan.
+    """
+    if stats is None:
+        stats = page_stats(paper, data_dir)
+    recorded = [list(s) for s in stats]
+
+    key = (paper, data_dir, pack_dir)
+    with _open_packs_lock:
+        cached = _open_packs.get(key)
+        if cached is not None and cached.index["pages"] == recorded:
+            _open_packs.move_to_end(key)
+            return cached
+
+    text_path, index_path = _pack_paths(paper, pack_dir)
+    index = _load_index(index_path)
+
+    # Packs written before the text fingerprint was recorded are rebuilt.
+    if (index is None or index["pages"] != recorded or "sha1" not in index
+            or not os.path.exists(text_path)):
+        index = pack_paper(paper, data_dir, pack_dir, stats)
+
+    buffer = b"" if index["byte_offsets"][-1] == 0 else _map(text_path)
+    packed = PackedPaper(paper, index, buffer, text_path, index_path)
+
+    with _open_packs_lock:
+        closing = [_open_packs.pop(key, None)]
+        _open_packs[key] = packed
+        while len(_open_packs) > MAX_OPEN_PACKS:
+            closing.append(_open_packs.popitem(last=False)[1])
+
+    for old in closing:
+        if old is not None and old is not packed:
+            old.close()
+
+    return packed
+
+
+def _map(text_path):
+    with open(text_path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_full_text(paper, data_dir=DATA_DIR, stats=None):
+    return open_paper(paper, data_dir, stats=stats).full_text()
+
+
+def read_pages(paper, first=0, last=None, data_dir=DATA_DIR, stats=None):
+    return open_paper(paper, data_dir, stats=stats).text(first, last)
@@ -1,21 +1,145 @@
+import hashlib
+import json
 import os
+import re
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import streamlit as st
 
+from utils.corpus import file_sha1
+from utils.fileio import atomic_path, atomic_write, file_lock
+from utils.manifest import save_json_atomic
+
 LITMAP_DIR = "data/litmap_database"
 
+# Uploads are saved into LITMAP_DIR as <name>-<sha1[:8]>.csv, unless a
+# CSV with the same bytes is already there, and from then on are listed
+# under "Use existing dataset" for every page and user. A dataset's ID
+# is the SHA-1 of its bytes; loaded frames carry it in
+# df.attrs["dataset_id"].
+
 REQUIRED_COLUMNS = [
     "Title", "Authors", "Journal", "Year",
     "Abstract", "Cited By", "Tags"
 ]
 
-@st.cache_data
-def load_csv(path_or_file):
-    if isinstance(path_or_file, str):
-        df = pd.read_csv(path_or_file)
-    else:
-        df = pd.read_csv(path_or_file)
+# Every CSV (from LITMAP_DIR or an upload) is converted once to Parquet,
+# named after the SHA-1 of its bytes, in data/litmap_cache/. Column names
+# are already normalised and REQUIRED_COLUMNS filled in there, so any
+# later load, from any page, session or process, memory-maps the Parquet
+# instead of re-parsing the CSV. Bump CACHE_VERSION when the
+# normalisation changes.
+CACHE_DIR = "data/litmap_cache"
+CACHE_VERSION = 2
+
+# path -> [mtime_ns, size, sha1], so unchanged files are not re-hashed.
+# Read once per lookup; new entries are merged in under file_lock, so
+# sessions hashing different files never drop each other's entries.
+FINGERPRINTS_FILE = "fingerprints.json"
+
+
+# --------------------------------------------------
+# Typed, chunked CSV reading
+# --------------------------------------------------
+
+# Text is held as Arrow strings (one buffer per column instead of a
+# Python object per cell), journals as categories and counts as nullable
+# integers; values that do not parse (or overflow) become <NA>. Pages
+# that validate or re-export a count column's text pass it in
+# ``raw_columns`` to keep it as text. The CSV is read CHUNK_ROWS rows at
+# a time and loading stops once the typed frame passes the memory budget.
+try:
+    TEXT_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+except TypeError:  # pandas < 2.3
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+
+CATEGORY_COLUMNS = ["Journal"]
+INTEGER_COLUMNS = {"Year": "Int16", "Cited By": "Int32", "References": "Int32"}
+
+CHUNK_ROWS = 50_000
+MEMORY_BUDGET_MB = 1024
+
+
+def _typed_chunk(chunk, raw_columns=()):
+    chunk.columns = [c.strip() for c in chunk.columns]
+
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in chunk.columns and col not in raw_columns:
+            info = np.iinfo(dtype.lower())
+            values = pd.to_numeric(chunk[col], errors="coerce")
+            whole = values.between(info.min, info.max) & (values == values.round())
+            chunk[col] = values.where(whole).astype(dtype)
+
+    for col in CATEGORY_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = chunk[col].astype("category")
+
+    return chunk
+
+
+def _concat_chunks(chunks):
+    # Align categories first so concat keeps them instead of falling back
+    # to object columns.
+    for col in CATEGORY_COLUMNS:
+        if chunks and col in chunks[0].columns:
+            categories = pd.api.types.union_categoricals(
+                [c[col] for c in chunks]
+            ).categories
+            for c in chunks:
+                c[col] = c[col].cat.set_categories(categories)
+
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def read_litmaps_csv(source, usecols=None, chunk_rows=CHUNK_ROWS,
+                     budget_mb=MEMORY_BUDGET_MB, raw_columns=()):
+    """
+    Read a Litmaps CSV in chunks with compact dtypes. ``usecols`` limits
+    the columns read (names are matched after stripping); columns in
+    ``raw_columns`` keep their text instead of becoming integers. Raises
+    MemoryError when the frame would exceed ``budget_mb``.
+    """
+    if usecols is not None:
+        wanted = set(usecols)
+        usecols = lambda c: c.strip() in wanted
 
+    reader = pd.read_csv(
+        source,
+        usecols=usecols,
+        dtype=TEXT_DTYPE,
+        chunksize=chunk_rows,
+    )
+
+    chunks = []
+    rows = 0
+    used = 0
+    budget = budget_mb * 1024 * 1024
+
+    with reader:
+        for chunk in reader:
+            chunk = _typed_chunk(chunk, raw_columns)
+            rows += len(chunk)
+            used += chunk.memory_usage(deep=True).sum()
+            if used > budget:
+                raise MemoryError(
+                    f"CSV needs more than {budget_mb} MB after {rows:,} rows; "
+                    f"load fewer columns or raise the memory budget."
+                )
+            chunks.append(chunk)
+
+    return _concat_chunks(chunks)
+
+
+def with_category(series, value):
+    """``series`` with ``value`` allowed, so categorical columns can be filled with it."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        return series.cat.add_categories([value])
+    return series
+
+
+def normalise_columns(df):
     # Normalize column names (safe)
     df.columns = [c.strip() for c in df.columns]
 
@@ -27,7 +151,197 @@ def load_csv(path_or_file):
     return df
 
 
-def data_source_selector():
+# --------------------------------------------------
+# Fingerprints
+# --------------------------------------------------
+
+def _fingerprints_path(cache_dir):
+    return os.path.join(cache_dir, FINGERPRINTS_FILE)
+
+
+def _load_fingerprints(cache_dir):
+    try:
+        with open(_fingerprints_path(cache_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_fingerprints(cache_dir, entries):
+    path = _fingerprints_path(cache_dir)
+    with file_lock(path):
+        # Re-read under the lock so entries saved meanwhile are kept.
+        fingerprints = _load_fingerprints(cache_dir)
+        fingerprints.update(entries)
+        save_json_atomic(path, fingerprints)
+
+
+def csv_fingerprints(paths, cache_dir=CACHE_DIR):
+    """{path: SHA-1} for CSV paths, reading the fingerprint table once."""
+    fingerprints = _load_fingerprints(cache_dir)
+    digests = {}
+    hashed = {}
+
+    for path in paths:
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        known = fingerprints.get(key)
+        if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+            digests[path] = known[2]
+        else:
+            digests[path] = file_sha1(path)
+            hashed[key] = [stat.st_mtime_ns, stat.st_size, digests[path]]
+
+    if hashed:
+        _save_fingerprints(cache_dir, hashed)
+    return digests
+
+
+def csv_fingerprint(path_or_file, cache_dir=CACHE_DIR):
+    """SHA-1 of a CSV path or uploaded file's bytes."""
+    if not isinstance(path_or_file, str):
+        return hashlib.sha1(path_or_file.getbuffer()).hexdigest()
+    return csv_fingerprints([path_or_file], cache_dir)[path_or_file]
+
+
+# --------------------------------------------------
+# Conversion
+# --------------------------------------------------
+
+def _columns_key(columns):
+    return hashlib.sha1(json.dumps(sorted(columns)).encode("utf-8")).hexdigest()[:8]
+
+
+def parquet_path(digest, cache_dir=CACHE_DIR, usecols=None, fill_required=True,
+                 raw_columns=()):
+    variant = "" if fill_required else ".raw"
+    if usecols is not None:
+        variant += "." + _columns_key(usecols)
+    if raw_columns:
+        variant += ".text-" + _columns_key(raw_columns)
+    return os.path.join(cache_dir, f"{digest}.v{CACHE_VERSION}{variant}.parquet")
+
+
+def _as_text(value):
+    if value is None or isinstance(value, str) or pd.isna(value):
+        return value
+    return str(value)
+
+
+def _to_table(df):
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing numbers and text (as read_csv leaves them) are
+        # stored as text.
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].map(_as_text)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def convert_csv(path_or_file, digest, cache_dir=CACHE_DIR, usecols=None,
+                fill_required=True, budget_mb=MEMORY_BUDGET_MB, raw_columns=()):
+    """Parse a CSV once and store it as typed, normalised Parquet."""
+    if not isinstance(path_or_file, str):
+        path_or_file.seek(0)
+    df = read_litmaps_csv(
+        path_or_file, usecols=usecols, budget_mb=budget_mb, raw_columns=raw_columns
+    )
+    if fill_required:
+        df = normalise_columns(df)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    target = parquet_path(digest, cache_dir, usecols, fill_required, raw_columns)
+    with atomic_path(target) as tmp_path:
+        pq.write_table(_to_table(df), tmp_path)
+
+    return target
+
+
+# One frame per Parquet file, shared by every session and rerun of the
+# process instead of unpickled afresh each time. Treat it as read-only:
+# load_csv hands out shallow copies, so pages add or replace columns on
+# their own copy without copying the data.
+@st.cache_resource(max_entries=8)
+def read_cached(parquet_file):
+    return pq.read_table(parquet_file, memory_map=True).to_pandas()
+
+
+def load_csv(path_or_file, cache_dir=CACHE_DIR, usecols=None,
+             fill_required=True, budget_mb=MEMORY_BUDGET_MB, raw_columns=()):
+    """
+    Load a Litmaps CSV (path or uploaded file) with normalised columns.
+    The CSV is parsed only the first time its content is seen.
+    ``fill_required=False`` skips adding missing REQUIRED_COLUMNS;
+    ``raw_columns`` lists INTEGER_COLUMNS to keep as text.
+    """
+    digest = csv_fingerprint(path_or_file, cache_dir)
+    target = parquet_path(digest, cache_dir, usecols, fill_required, raw_columns)
+
+    if not os.path.exists(target):
+        convert_csv(
+            path_or_file, digest, cache_dir, usecols, fill_required, budget_mb,
+            raw_columns
+        )
+
+    df = read_cached(target).copy(deep=False)
+    df.attrs["dataset_id"] = digest
+    return df
+
+
+def load_or_stop(path_or_file, **kwargs):
+    """load_csv for pages: a CSV over the memory budget stops the page."""
+    try:
+        return load_csv(path_or_file, **kwargs)
+    except MemoryError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
+
+# --------------------------------------------------
+# Dataset registry
+# --------------------------------------------------
+
+def list_datasets(litmap_dir=LITMAP_DIR):
+    if not os.path.isdir(litmap_dir):
+        return []
+    return sorted(f for f in os.listdir(litmap_dir) if f.endswith(".csv"))
+
+
+def upload_digest(uploaded):
+    """SHA-1 of an uploaded file, hashed once per upload and session."""
+    digests = st.session_state.setdefault("upload_digests", {})
+    digest = digests.get(uploaded.file_id)
+    if digest is None:
+        digest = digests[uploaded.file_id] = csv_fingerprint(uploaded)
+    return digest
+
+
+def register_upload(uploaded, litmap_dir=LITMAP_DIR, cache_dir=CACHE_DIR):
+    """
+    Path of the registry CSV holding an uploaded file's bytes, saving it
+    on first upload. Re-uploads of the same content (under any name)
+    return the existing file.
+    """
+    digest = upload_digest(uploaded)
+
+    paths = [os.path.join(litmap_dir, name) for name in list_datasets(litmap_dir)]
+    for path, known in csv_fingerprints(paths, cache_dir).items():
+        if known == digest:
+            return path
+
+    stem = os.path.splitext(os.path.basename(uploaded.name or "upload"))[0]
+    stem = re.sub(r"[^\w.-]+", "_", stem).strip("._") or "upload"
+
+    os.makedirs(litmap_dir, exist_ok=True)
+    path = os.path.join(litmap_dir, f"{stem}-{digest[:8]}.csv")
+    atomic_write(path, uploaded.getbuffer())
+    return path
+
+
+def data_source_selector(**load_kwargs):
+    """Sidebar dataset picker; ``load_kwargs`` are passed to load_csv."""
     st.sidebar.header("📂 Data Source")
 
     option = st.sidebar.radio(
@@ -36,10 +350,10 @@ def data_source_selector():
     )
 
     if option == "Use existing dataset":
-        files = [
-            f for f in os.listdir(LITMAP_DIR)
-            if f.endswith(".csv")
-        ]
+        files = list_datasets()
+        if not files:
+            st.warning("No datasets yet: upload a CSV.")
+            st.stop()
 
         selected = st.sidebar.selectbox(
             "Select dataset",
@@ -47,7 +361,6 @@ def data_source_selector():
         )
 
         path = os.path.join(LITMAP_DIR, selected)
-        df = load_csv(path)
 
     else:
         uploaded = st.sidebar.file_uploader(
@@ -57,6 +370,7 @@ def data_source_selector():
         if uploaded is None:
             st.warning("Please upload a CSV file.")
             st.stop()
-        df = load_csv(uploaded)
+        path = register_upload(uploaded)
+        st.sidebar.caption(f"Saved as {os.path.basename(path)}")
 
-    return df
+    return load_or_stop(path, **load_kwargs)
@@ -0,0 +1,59 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-user, no cross-process locking
+    fcntl = None
+
+# Crash-safe file helpers shared by the stores. Every atomic write goes
+# to a temp file next to the target and is renamed over it, so readers see
+# the old or the new content and never a torn one; file_lock serialises
+# writers across processes.
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Temp file path next to ``path`` for a writer that needs a file name
+    (e.g. pyarrow); renamed over ``path`` when the block succeeds and
+    removed when it fails.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_open(path, mode="wb"):
+    """File object whose content replaces ``path`` when the block succeeds."""
+    encoding = None if "b" in mode else "utf-8"
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+
+
+def atomic_write(path, data, mode="wb"):
+    with atomic_open(path, mode) as f:
+        f.write(data)
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on ``path`` + ".lock", held for the with block."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
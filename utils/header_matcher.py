@@ -0,0 +1,210 @@
+import hashlib
+import json
+import re
+from collections import deque
+from functools import reduce
+
+# label_code.json compiled into one Aho-Corasick automaton over every
+# header variant, so labelling a header is a single scan of its characters
+# however many labels and variants the config holds.
+#
+# Tie-breaking when several variants occur in the same header:
+#   1. the longest matching variant wins;
+#   2. on equal length, the label that comes first in label_code.json wins.
+#
+# Empty variants are ignored.
+#
+# HeaderScanner runs the same kind of automaton over a whole paper to find
+# every occurrence of a list of pasted headers (see
+# utils.sections.find_header_candidates).
+
+# config hash -> HeaderMatcher, per process
+_compiled = {}
+
+# header tuple -> HeaderScanner, per process
+_scanners = {}
+MAX_SCANNERS = 64
+
+# Length of the header prefixes the scanner jumps between with re.
+SKIP_PREFIX = 4
+
+
+def _build(patterns):
+    """
+    Aho-Corasick automaton over (lower-cased text, tag) pairs. Returns
+    (goto, fail, out): node 0 is the root, and out[node] lists the
+    (length, tag) of every pattern ending at node, including via its
+    failure chain.
+    """
+    goto = [{}]
+    fail = [0]
+    out = [()]
+
+    for text, tag in patterns:
+        node = 0
+        for ch in text:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                fail.append(0)
+                out.append(())
+            node = nxt
+        out[node] += ((len(text), tag),)
+
+    queue = deque(goto[0].values())
+
+    while queue:
+        node = queue.popleft()
+        for ch, child in goto[node].items():
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[child] = goto[f].get(ch, 0)
+            out[child] += out[fail[child]]
+            queue.append(child)
+
+    return goto, fail, out
+
+
+class HeaderMatcher:
+
+    def __init__(self, label_config):
+        self.labels = list(label_config)
+
+        patterns = [
+            (variant.strip().lower(), label_index)
+            for label_index, variants in enumerate(label_config.values())
+            for variant in variants
+            if variant.strip()
+        ]
+
+        # Each node keeps only the best (length, label index) ending there.
+        self._goto, self._fail, out = _build(patterns)
+        self._best = [reduce(self._better, ends, None) for ends in out]
+
+    @staticmethod
+    def _better(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        # Longer variant first, then earlier label.
+        return a if (a[0], -a[1]) >= (b[0], -b[1]) else b
+
+    def match(self, header):
+        """Return the label for ``header`` (lower-cased text) or None."""
+        goto, fail, best = self._goto, self._fail, self._best
+
+        node = 0
+        found = None
+
+        for ch in header:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if best[node] is not None:
+                found = self._better(found, best[node])
+
+        return self.labels[found[1]] if found else None
+
+
+def _fold(text):
+    """Lower-case ``text`` without changing its length (offsets stay valid)."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # "İ" lowers to "i" plus a combining dot; keep just the "i".
+    return "".join(ch.lower()[0] for ch in text)
+
+
+class HeaderScanner:
+
+    def __init__(self, headers):
+        self.headers = list(dict.fromkeys(h.lower() for h in headers if h))
+
+        goto, fail, self._out = _build(
+            (header, index) for index, header in enumerate(self.headers)
+        )
+
+        # Failure links folded into the transitions, so each character is
+        # one dict lookup; a missing key means "back to the root".
+        alphabet = {ch for edges in goto for ch in edges}
+        self._delta = []
+        for node in range(len(goto)):
+            row = {}
+            for ch in alphabet:
+                f = node
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                if target:
+                    row[ch] = target
+            self._delta.append(row)
+
+        # From the root, no match can begin before the next place one of
+        # the header prefixes occurs, so the scan jumps there in C.
+        if self.headers:
+            k = min(SKIP_PREFIX, min(len(h) for h in self.headers))
+            prefixes = sorted({re.escape(h[:k]) for h in self.headers})
+            self._skip = re.compile("|".join(prefixes))
+        else:
+            self._skip = None
+
+    def finditer(self, text):
+        """
+        Yield (start, end, header) for every occurrence of every header in
+        ``text``, case-insensitively, overlapping ones included, in order
+        of their end.
+        """
+        if self._skip is None:
+            return
+
+        text = _fold(text)
+        delta, out, headers = self._delta, self._out, self.headers
+        search = self._skip.search
+        n = len(text)
+        i = 0
+
+        while True:
+            found = search(text, i)
+            if found is None:
+                return
+
+            i = found.start()
+            node = 0
+            while i < n:
+                node = delta[node].get(text[i], 0)
+                i += 1
+                for length, index in out[node]:
+                    yield i - length, i, headers[index]
+                if not node:
+                    break
+
+
+def config_hash(label_config):
+    data = json.dumps(label_config, ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def compile_labels(label_config):
+    """HeaderMatcher for a label config dict, compiled once per content."""
+    key = config_hash(label_config)
+    matcher = _compiled.get(key)
+    if matcher is None:
+        matcher = HeaderMatcher(label_config)
+        _compiled[key] = matcher
+    return matcher
+
+
+def compile_headers(headers):
+    """HeaderScanner for a header list, compiled once per list."""
+    key = tuple(headers)
+    scanner = _scanners.get(key)
+    if scanner is None:
+        if len(_scanners) >= MAX_SCANNERS:
+            _scanners.clear()
+        scanner = HeaderScanner(headers)
+        _scanners[key] = scanner
+    return scanner
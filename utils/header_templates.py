@@ -0,0 +1,115 @@
+import re
+
+from utils.corpus import DATA_DIR, open_paper
+from utils.sections import (
+    HEADER_NUMBER,
+    clean_header,
+    custom_header_spans,
+    find_header_candidates,
+    with_pages,
+)
+
+# Header templates learned from data/approved_segments.jsonl: every approved
+# segmentation contributes its ordered header list, normalised the way
+# clean_header normalises pasted headers (plus bare "2 " / "4 |" numbering,
+# case and spacing). An unsegmented paper is scored against every template
+# in one scan of its text and segmented with the best one; papers below
+# the score threshold are left for manual segmentation in 0_0_10.
+
+MIN_SCORE = 0.6
+
+# "Results (2)" keys come from repeated headers; the template keeps both.
+REPEAT_SUFFIX = re.compile(r"\s+\(\d+\)$")
+LEADING_NUMBER = re.compile(r"^" + HEADER_NUMBER + r"\s+")
+
+
+def normalise_header(header):
+    header = REPEAT_SUFFIX.sub("", clean_header(header))
+    header = LEADING_NUMBER.sub("", header)
+    return " ".join(header.split())
+
+
+def build_templates(approved):
+    """
+    Distinct header templates from {paper: {header: spans}}, most used
+    first. Each is {"headers": [...], "papers": [...]}.
+    """
+    templates = {}
+
+    for paper, segments in approved.items():
+        headers = [
+            normalise_header(h) for h in segments if h != "Pre-Section"
+        ]
+        headers = [h for h in headers if h]
+        if not headers:
+            continue
+
+        key = tuple(h.lower() for h in headers)
+        template = templates.setdefault(key, {"headers": headers, "papers": []})
+        template["papers"].append(paper)
+
+    return sorted(templates.values(), key=lambda t: -len(t["papers"]))
+
+
+def score_templates(full_text, templates):
+    """
+    Return ([(score, matched, template)] best first, present headers). The
+    score is the share of a template's headers that open a line in the
+    paper. All templates are checked in one pass over the text.
+    """
+    headers = {h for t in templates for h in t["headers"]}
+    candidates = find_header_candidates(full_text, headers)
+
+    present = {
+        header for header, occurrences in candidates.items()
+        if any(at_line_start for _, at_line_start in occurrences)
+    }
+
+    scored = []
+    for template in templates:
+        matched = sum(1 for h in template["headers"] if h.lower() in present)
+        scored.append((matched / len(template["headers"]), matched, template))
+
+    # Higher score, then more matched headers, then the more used template.
+    scored.sort(key=lambda s: (-s[0], -s[1], -len(s[2]["papers"])))
+    return scored, present
+
+
+def auto_segment(journal_name, templates, min_score=MIN_SCORE, data_dir=DATA_DIR):
+    """
+    Segment one paper with its best-matching template. Returns a record
+    with the template's source paper, the score, the paper's text
+    fingerprint and the segment spans (None when no template reaches
+    ``min_score``).
+    """
+    packed = open_paper(journal_name, data_dir)
+    full_text = packed.full_text()
+    scored, present = score_templates(full_text, templates) if templates else ([], set())
+
+    record = {
+        "journal_name": journal_name,
+        "fingerprint": packed.fingerprint,
+        "template": None,
+        "score": 0.0,
+        "segments": None,
+    }
+
+    if not scored:
+        return record
+
+    score, _, template = scored[0]
+    record["template"] = template["papers"][0]
+    record["score"] = round(score, 3)
+
+    if score >= min_score:
+        # Only headers that open a line; mid-sentence mentions are not cuts.
+        headers = [h for h in template["headers"] if h.lower() in present]
+        segments = custom_header_spans(full_text, headers)
+        # A lone Pre-Section is not a segmentation.
+        if len([h for h in segments if h != "Pre-Section"]) >= 2:
+            record["segments"] = {
+                header: with_pages(spans, packed.char_offsets)
+                for header, spans in segments.items()
+            }
+
+    return record
@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import shutil
+
+from utils.corpus import DATA_DIR, PARTIAL_MARKER
+from utils.fileio import atomic_write
+
+PDF_DIR = "data/pdf"
+
+# PARTIAL_MARKER is written when a PDF starts ingesting and replaced by
+# the done marker once every page is on disk; list_papers hides folders
+# that still hold it. Page folders with neither marker came from the
+# external OCR step and are never overwritten.
+DONE_MARKER = ".ingest.done.json"
+
+
+# --------------------------------------------------
+# PDF backends
+# --------------------------------------------------
+
+# Backends yield the page count first, then (index, text) for every page
+# not listed in ``skip``; skipped pages are never rendered.
+
+def _page_texts_pymupdf(pdf_path, skip):
+    import pymupdf
+
+    with pymupdf.open(pdf_path) as doc:
+        yield doc.page_count
+        for i in range(doc.page_count):
+            if i not in skip:
+                yield i, doc[i].get_text("text")
+
+
+def _page_texts_pypdf(pdf_path, skip):
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    yield len(reader.pages)
+    for i, page in enumerate(reader.pages):
+        if i not in skip:
+            yield i, page.extract_text() or ""
+
+
+def _pick_backend():
+    try:
+        import pymupdf  # noqa: F401
+        return _page_texts_pymupdf
+    except ImportError:
+        pass
+
+    try:
+        import pypdf  # noqa: F401
+        return _page_texts_pypdf
+    except ImportError:
+        raise ImportError(
+            "PDF ingestion needs PyMuPDF or pypdf: pip install pymupdf"
+        )
+
+
+# --------------------------------------------------
+# Paths + markers
+# --------------------------------------------------
+
+def paper_name(pdf_path):
+    # "<stem>.pdf" -> "<stem>_pdf", the folder layout of data/ocr_pdf
+    return os.path.splitext(os.path.basename(pdf_path))[0] + "_pdf"
+
+
+# Zero-padded to four digits, wider from page 10,000 on.
+PAGE_NAME = re.compile(r"page_(\d+)\.md")
+
+
+def page_filename(i):
+    return "page_%04d.md" % i
+
+
+def page_number(name):
+    """Page index of a page_filename, or None for any other file."""
+    match = PAGE_NAME.fullmatch(name)
+    return int(match.group(1)) if match else None
+
+
+def _source_stamp(pdf_path):
+    st = os.stat(pdf_path)
+    return {"source": os.path.basename(pdf_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _read_marker(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ingest_status(pdf_path, data_dir=DATA_DIR):
+    """
+    One of "new", "partial", "done", "stale" (source PDF changed since it
+    was ingested) or "external" (pages not produced by this pipeline).
+    """
+    folder = os.path.join(data_dir, paper_name(pdf_path))
+    pages_path = os.path.join(folder, "pages")
+    stamp = _source_stamp(pdf_path)
+
+    done = _read_marker(os.path.join(folder, DONE_MARKER))
+    if done is not None:
+        return "done" if done["stamp"] == stamp else "stale"
+
+    partial = _read_marker(os.path.join(folder, PARTIAL_MARKER))
+    if partial is not None:
+        return "partial" if partial["stamp"] == stamp else "stale"
+
+    if os.path.isdir(pages_path) and any(
+        f.endswith(".md") for f in os.listdir(pages_path)
+    ):
+        return "external"
+
+    return "new"
+
+
+def list_pdfs(pdf_dir=PDF_DIR):
+    if not os.path.isdir(pdf_dir):
+        return []
+
+    return sorted(
+        os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir)
+        if f.lower().endswith(".pdf") and not f.startswith(".")
+    )
+
+
+def pending_pdfs(pdf_dir=PDF_DIR, data_dir=DATA_DIR, force=False):
+    pdfs = list_pdfs(pdf_dir)
+
+    wanted = {"new", "partial", "stale"}
+    if force:
+        wanted.add("external")
+
+    return [p for p in pdfs if ingest_status(p, data_dir) in wanted]
+
+
+# --------------------------------------------------
+# Ingestion
+# --------------------------------------------------
+
+def ingest_pdf(pdf_path, data_dir=DATA_DIR):
+    """
+    Extract every page of one PDF into data/ocr_pdf/<name>_pdf/pages/.
+    Each page is written atomically, so an interrupted run resumes at
+    the first missing page. Returns (paper, pages_written, page_count).
+    """
+    paper = paper_name(pdf_path)
+    folder = os.path.join(data_dir, paper)
+    pages_path = os.path.join(folder, "pages")
+    created = not os.path.exists(folder)
+
+    try:
+        return _ingest(pdf_path, paper, folder, pages_path)
+    except Exception:
+        # Drop a folder this call made, so an unreadable PDF leaves nothing
+        # behind. An older folder, or one left by an interrupt, keeps its
+        # partial marker (and stays hidden) for the next run to resume.
+        if created:
+            shutil.rmtree(folder, ignore_errors=True)
+        raise
+
+
+def _ingest(pdf_path, paper, folder, pages_path):
+    os.makedirs(pages_path, exist_ok=True)
+
+    stamp = _source_stamp(pdf_path)
+    partial_path = os.path.join(folder, PARTIAL_MARKER)
+    done_path = os.path.join(folder, DONE_MARKER)
+
+    previous = _read_marker(partial_path) or _read_marker(done_path)
+    resume = previous is not None and previous["stamp"] == stamp
+
+    if os.path.exists(done_path):
+        os.remove(done_path)
+    atomic_write(partial_path, json.dumps({"stamp": stamp}), mode="w")
+
+    skip = set()
+    if resume:
+        skip = {page_number(name) for name in os.listdir(pages_path)} - {None}
+
+    texts = _pick_backend()(pdf_path, skip)
+    page_count = next(texts)
+    written = 0
+
+    for i, text in texts:
+        atomic_write(os.path.join(pages_path, page_filename(i)), text, mode="w")
+        written += 1
+
+    # A re-ingested PDF may have fewer pages than before.
+    if not resume:
+        for name in os.listdir(pages_path):
+            number = page_number(name)
+            if number is not None and number >= page_count:
+                os.remove(os.path.join(pages_path, name))
+
+    atomic_write(done_path, json.dumps({"stamp": stamp, "page_count": page_count}), mode="w")
+    os.remove(partial_path)
+
+    return paper, written, page_count
+
+
+def try_ingest_pdf(pdf_path, data_dir=DATA_DIR):
+    """
+    ingest_pdf for batch runs: returns (paper, written, page_count, error),
+    with ``error`` the message of whatever stopped this PDF, else None.
+    """
+    try:
+        return ingest_pdf(pdf_path, data_dir) + (None,)
+    except Exception as e:
+        return paper_name(pdf_path), 0, 0, f"{type(e).__name__}: {e}"
@@ -0,0 +1,61 @@
+from bisect import bisect_left, bisect_right
+
+# Union of half-open [start, end) character intervals, kept as sorted,
+# disjoint, merged runs in two parallel lists. Adding an interval is a
+# bisect plus a splice of the runs it touches, and the covered length is
+# maintained as intervals arrive, so coverage never needs a full rebuild.
+
+
+class IntervalSet:
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        self.covered = 0
+
+        for start, end in intervals:
+            self.add(start, end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def add(self, start, end):
+        """Add [start, end); touching or overlapping runs are merged."""
+        if end <= start:
+            return
+
+        # Runs [lo, hi) overlap or touch the new interval.
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+            self.covered -= sum(
+                e - s for s, e in zip(self.starts[lo:hi], self.ends[lo:hi])
+            )
+
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+        self.covered += end - start
+
+    def contains(self, pos):
+        i = bisect_right(self.starts, pos) - 1
+        return i >= 0 and pos < self.ends[i]
+
+    def gaps(self, lo, hi):
+        """Uncovered [start, end) intervals between ``lo`` and ``hi``."""
+        cursor = lo
+        i = bisect_right(self.ends, lo)
+
+        while i < len(self.starts) and self.starts[i] < hi:
+            if self.starts[i] > cursor:
+                yield cursor, self.starts[i]
+            cursor = max(cursor, self.ends[i])
+            i += 1
+
+        if cursor < hi:
+            yield cursor, hi
@@ -0,0 +1,221 @@
+import json
+import os
+
+from utils.corpus import DATA_DIR, file_sha1, list_papers, page_sha1, page_stats
+from utils.fileio import atomic_open
+from utils.parallel import imap_ordered, run_parallel
+from utils.section_store import remove_paper, stored_papers, write_paper
+
+
+# --------------------------------------------------
+# Fingerprints
+# --------------------------------------------------
+
+def config_version(path):
+    """Content hash of a config file such as label_code.json, or None."""
+    if not os.path.exists(path):
+        return None
+    return file_sha1(path)
+
+
+def scan_paper(paper, previous_pages=None, data_dir=DATA_DIR):
+    """
+    Fingerprint every page of a paper as {name: [mtime_ns, size, sha1]}.
+    A page is only re-hashed when its mtime or size moved since the
+    previous manifest, so unchanged papers cost one scandir.
+    """
+    previous_pages = previous_pages or {}
+
+    pages = {}
+    for name, mtime_ns, size in page_stats(paper, data_dir):
+        known = previous_pages.get(name)
+        if known and known[0] == mtime_ns and known[1] == size:
+            pages[name] = known
+        else:
+            pages[name] = [mtime_ns, size, page_sha1(paper, name, data_dir)]
+
+    return pages
+
+
+def _content_key(pages):
+    return sorted((name, fp[1], fp[2]) for name, fp in pages.items())
+
+
+# --------------------------------------------------
+# Manifest I/O
+# --------------------------------------------------
+
+def manifest_path(output_file):
+    root, _ = os.path.splitext(output_file)
+    return root + ".manifest.json"
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def save_json_atomic(path, data, indent=None):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_open(path, "w") as f:
+        json.dump(data, f, indent=indent)
+
+
+# --------------------------------------------------
+# Planning + merging
+# --------------------------------------------------
+
+def plan_update(manifest, extractor, label_version=None, data_dir=DATA_DIR):
+    """
+    Compare the corpus against a manifest.
+
+    Returns (changed, removed, new_manifest). Every paper counts as changed
+    when the extractor or the label config version differs from the run
+    that produced the manifest.
+    """
+    same_run = (
+        manifest.get("extractor") == extractor
+        and manifest.get("label_version") == label_version
+    )
+    previous = manifest.get("papers", {}) if same_run else {}
+
+    papers = {}
+    changed = []
+
+    for paper in list_papers(data_dir):
+        old_pages = previous.get(paper, {}).get("pages")
+        pages = scan_paper(paper, old_pages, data_dir)
+        papers[paper] = {"pages": pages}
+
+        if old_pages is None or _content_key(old_pages) != _content_key(pages):
+            changed.append(paper)
+
+    removed = [p for p in previous if p not in papers]
+
+    new_manifest = {
+        "extractor": extractor,
+        "label_version": label_version,
+        "papers": papers,
+    }
+
+    return changed, removed, new_manifest
+
+
+def merge_rows(existing_rows, new_rows, replaced_papers, paper_order):
+    """
+    Drop the rows of every replaced paper, add the freshly extracted rows
+    and keep the output grouped in corpus order.
+    """
+    replaced = set(replaced_papers)
+    kept = [r for r in existing_rows if r.get("journal_name") not in replaced]
+
+    rank = {paper: i for i, paper in enumerate(paper_order)}
+    merged = kept + new_rows
+    merged.sort(key=lambda r: rank.get(r.get("journal_name"), len(rank)))
+
+    return merged
+
+
+def update_output(
+    output_file,
+    extract_paper,
+    extractor,
+    label_version=None,
+    data_dir=DATA_DIR,
+    workers=None,
+    progress=None,
+):
+    """
+    Re-run ``extract_paper(journal_name) -> [row, ...]`` only for new or
+    changed papers and merge the rows into ``output_file``. Changed papers
+    are extracted on a process pool (see utils/parallel.py).
+
+    Returns (rows, changed_papers, removed_papers).
+    """
+    mpath = manifest_path(output_file)
+    manifest = load_manifest(mpath) if os.path.exists(output_file) else {}
+
+    changed, removed, new_manifest = plan_update(
+        manifest, extractor, label_version, data_dir
+    )
+
+    if manifest and not changed and not removed:
+        with open(output_file, "r", encoding="utf-8") as f:
+            return json.load(f), [], []
+
+    existing_rows = []
+    if manifest:
+        with open(output_file, "r", encoding="utf-8") as f:
+            existing_rows = json.load(f)
+
+    new_rows = []
+    for rows in run_parallel(extract_paper, changed, workers, progress):
+        new_rows.extend(rows)
+
+    rows = merge_rows(
+        existing_rows,
+        new_rows,
+        changed + removed,
+        list(new_manifest["papers"]),
+    )
+
+    # Output before manifest: a crash in between only causes a redo.
+    save_json_atomic(output_file, rows)
+    save_json_atomic(mpath, new_manifest)
+
+    return rows, changed, removed
+
+
+def update_partitioned_output(
+    output_dir,
+    extract_paper,
+    extractor,
+    label_version=None,
+    data_dir=DATA_DIR,
+    workers=None,
+    progress=None,
+):
+    """
+    Like update_output, but rows are stored one Parquet file per paper in
+    ``output_dir`` (utils/section_store.py): only the files of new or
+    changed papers are rewritten and no existing rows are loaded.
+
+    Returns (changed_papers, removed_papers).
+    """
+    mpath = os.path.join(output_dir, "_manifest.json")
+    manifest = load_manifest(mpath)
+
+    changed, removed, new_manifest = plan_update(
+        manifest, extractor, label_version, data_dir
+    )
+
+    # A paper whose file went missing is re-extracted; stray files of
+    # papers no longer in the corpus (or from another run) are dropped.
+    stored = set(stored_papers(output_dir))
+    changed_set = set(changed)
+    changed += [
+        p for p in new_manifest["papers"]
+        if p not in stored and p not in changed_set
+    ]
+    removed = sorted(set(removed) | (stored - set(new_manifest["papers"])))
+
+    total = len(changed)
+    for done, (paper, rows) in enumerate(
+        zip(changed, imap_ordered(extract_paper, changed, workers)), start=1
+    ):
+        write_paper(output_dir, paper, rows)
+        if progress:
+            progress(done, total)
+
+    for paper in removed:
+        remove_paper(output_dir, paper)
+
+    # Files before manifest: a crash in between only causes a redo.
+    save_json_atomic(mpath, new_manifest)
+
+    return changed, removed
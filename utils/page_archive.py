@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+# Single-file page archive: one file per paper holding every page as an
+# independently compressed frame, followed by a JSON page index and an
+# 8-byte footer with the index length. Any page can be read with one seek.
+#
+#     MAGIC | frame 0 | frame 1 | ... | index JSON | <Q index length>
+
+MAGIC = b"OCRPAGES1\n"
+FOOTER = struct.Struct("<Q")
+
+# path -> (mtime_ns, size, PageArchive), reused across Streamlit reruns
+_open_archives = {}
+
+
+# --------------------------------------------------
+# Codecs
+# --------------------------------------------------
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def default_codec():
+    return "zstd" if _zstd() is not None else "zlib"
+
+
+def _compress(data, codec):
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompress(data, codec):
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise ImportError("This archive is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+# --------------------------------------------------
+# Writing
+# --------------------------------------------------
+
+def write_archive(f, pages, codec=None):
+    """
+    Write ``pages`` — an iterable of (name, utf-8 bytes) in page order —
+    to the binary file object ``f``.
+    """
+    codec = codec or default_codec()
+
+    f.write(MAGIC)
+    offset = len(MAGIC)
+    entries = []
+
+    for name, data in pages:
+        frame = _compress(data, codec)
+        f.write(frame)
+        entries.append([name, offset, len(frame), len(data), hashlib.sha1(data).hexdigest()])
+        offset += len(frame)
+
+    index = json.dumps({"codec": codec, "pages": entries}).encode("utf-8")
+    f.write(index)
+    f.write(FOOTER.pack(len(index)))
+
+
+# --------------------------------------------------
+# Reading
+# --------------------------------------------------
+
+class PageArchive:
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a page archive: {path}")
+
+            f.seek(-FOOTER.size, os.SEEK_END)
+            (index_length,) = FOOTER.unpack(f.read(FOOTER.size))
+            f.seek(-(FOOTER.size + index_length), os.SEEK_END)
+            index = json.loads(f.read(index_length))
+
+        self.codec = index["codec"]
+        self.entries = index["pages"]
+        self.page_names = [e[0] for e in self.entries]
+        self._by_name = {e[0]: e for e in self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def raw_size(self, name):
+        return self._by_name[name][3]
+
+    def sha1(self, name):
+        return self._by_name[name][4]
+
+    def read_bytes(self, name):
+        _, offset, length, _, _ = self._by_name[name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return _decompress(f.read(length), self.codec)
+
+    def read_page(self, name):
+        return self.read_bytes(name).decode("utf-8")
+
+
+def open_archive(path):
+    st = os.stat(path)
+    cached = _open_archives.get(path)
+
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+
+    archive = PageArchive(path)
+    _open_archives[path] = (st.st_mtime_ns, st.st_size, archive)
+    return archive
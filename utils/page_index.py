@@ -0,0 +1,90 @@
+import json
+import os
+import re
+from collections import Counter
+
+from utils.corpus import DATA_DIR, PACK_DIR, page_stats, read_page
+from utils.fileio import atomic_write
+
+# Per-page word counts and token counts, stored next to the corpus pack as
+# data/ocr_pack/<paper>.stats.json. Only pages whose mtime or size changed
+# are re-read when the index is refreshed.
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# paper -> index dict, reused across Streamlit reruns
+_loaded = {}
+
+
+def page_tokens(text):
+    return Counter(WORD_PATTERN.findall(text.lower()))
+
+
+def _stats_path(paper, pack_dir):
+    return os.path.join(pack_dir, paper + ".stats.json")
+
+
+def _read_index(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_page_index(paper, data_dir=DATA_DIR, pack_dir=PACK_DIR, stats=None):
+    """
+    Return {"pages": {name: {"stamp", "word_count", "tokens"}}} for a
+    paper, in page order, refreshing only the pages that changed.
+    """
+    if stats is None:
+        stats = page_stats(paper, data_dir)
+    stamps = {name: [mtime_ns, size] for name, mtime_ns, size in stats}
+
+    index = _loaded.get((paper, data_dir, pack_dir))
+    if index is None:
+        index = _read_index(_stats_path(paper, pack_dir)) or {"pages": {}}
+
+    old_pages = index["pages"]
+    if list(old_pages) == list(stamps) and all(
+        old_pages[name]["stamp"] == stamp for name, stamp in stamps.items()
+    ):
+        _loaded[(paper, data_dir, pack_dir)] = index
+        return index
+
+    pages = {}
+
+    for name, stamp in stamps.items():
+        entry = old_pages.get(name)
+        if entry is None or entry["stamp"] != stamp:
+            tokens = page_tokens(read_page(paper, name, data_dir))
+            entry = {
+                "stamp": stamp,
+                "word_count": sum(tokens.values()),
+                "tokens": dict(tokens),
+            }
+        pages[name] = entry
+
+    index = {"paper": paper, "pages": pages}
+
+    os.makedirs(pack_dir, exist_ok=True)
+    atomic_write(_stats_path(paper, pack_dir), json.dumps(index), mode="w")
+    _loaded[(paper, data_dir, pack_dir)] = index
+
+    return index
+
+
+def word_counts(index, page_names=None):
+    pages = index["pages"]
+    names = page_names if page_names is not None else list(pages)
+    return [pages[name]["word_count"] for name in names]
+
+
+def token_counts(index, page_names=None):
+    pages = index["pages"]
+    names = page_names if page_names is not None else list(pages)
+
+    total = Counter()
+    for name in names:
+        total.update(pages[name]["tokens"])
+    return total
@@ -0,0 +1,77 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Process-pool helpers for corpus-wide work. ``func`` must be importable
+# from a module (use functools.partial for extra arguments), because page
+# scripts are not importable in worker processes.
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _resolve_workers(workers, n_items):
+    if workers is None:
+        workers = default_workers()
+    return max(1, min(int(workers), n_items))
+
+
+def run_parallel(func, items, workers=None, progress=None):
+    """
+    Apply ``func`` to every item on a process pool and return the results
+    in input order. ``progress(done, total)`` is called as items finish.
+    """
+    items = list(items)
+    total = len(items)
+    results = [None] * total
+
+    if total == 0:
+        return results
+
+    workers = _resolve_workers(workers, total)
+
+    # Skip pool start-up when there is nothing to spread out.
+    if workers == 1:
+        for i, item in enumerate(items):
+            results[i] = func(item)
+            if progress:
+                progress(i + 1, total)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, item): i for i, item in enumerate(items)}
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(done, total)
+
+    return results
+
+
+def imap_ordered(func, items, workers=None, window=None):
+    """
+    Lazily yield ``func(item)`` in input order, keeping at most ``window``
+    items in flight so memory stays bounded on very large inputs.
+    """
+    if workers is None:
+        workers = default_workers()
+    workers = max(1, int(workers))
+
+    if workers == 1:
+        for item in items:
+            yield func(item)
+        return
+
+    window = window or workers * 4
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from functools import partial
+
+from utils.corpus import DATA_DIR, PACK_DIR, list_papers, page_stats, read_page
+from utils.parallel import imap_ordered
+
+# Corpus-wide full-text index over every OCR page, stored as an SQLite FTS5
+# table in data/ocr_pack/search.sqlite. FTS5 keeps positional postings, so
+# phrase queries ("life cycle assessment") and BM25 ranking come from the
+# index itself; nothing scans page text at query time.
+#
+# Each paper is stored with a fingerprint of its page stats; an update only
+# re-reads papers whose pages were added, removed or modified. FTS5 cannot
+# index the paper column, so page_rows maps each paper to the rowids of its
+# pages and a paper's old pages are deleted by rowid.
+
+INDEX_FILE = "search.sqlite"
+
+# Hit markers passed to highlight(); control characters never occur in OCR text.
+_OPEN, _CLOSE = "\x02", "\x03"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    paper UNINDEXED,
+    page UNINDEXED,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS page_rows (
+    rowid INTEGER PRIMARY KEY,
+    paper TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS page_rows_paper ON page_rows (paper);
+"""
+
+SCHEMA_VERSION = 1
+
+TERM_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def index_path(pack_dir=PACK_DIR):
+    return os.path.join(pack_dir, INDEX_FILE)
+
+
+def connect(pack_dir=PACK_DIR):
+    os.makedirs(pack_dir, exist_ok=True)
+    conn = sqlite3.connect(index_path(pack_dir))
+    conn.executescript(_SCHEMA)
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        # Indexes built before page_rows existed: map their pages once.
+        with conn:
+            conn.execute("DELETE FROM page_rows")
+            conn.execute("INSERT INTO page_rows (rowid, paper) SELECT rowid, paper FROM pages")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def paper_fingerprint(stats):
+    return hashlib.sha1(json.dumps(stats).encode("utf-8")).hexdigest()
+
+
+# --------------------------------------------------
+# Indexing
+# --------------------------------------------------
+
+def _delete_paper(conn, paper):
+    rowids = conn.execute("SELECT rowid FROM page_rows WHERE paper = ?", (paper,)).fetchall()
+    conn.executemany("DELETE FROM pages WHERE rowid = ?", rowids)
+    conn.execute("DELETE FROM page_rows WHERE paper = ?", (paper,))
+
+
+def _insert_pages(conn, rows):
+    for paper, page, body in rows:
+        rowid = conn.execute(
+            "INSERT INTO pages (paper, page, body) VALUES (?, ?, ?)", (paper, page, body)
+        ).lastrowid
+        conn.execute("INSERT INTO page_rows (rowid, paper) VALUES (?, ?)", (rowid, paper))
+
+
+def _paper_rows(paper, data_dir):
+    return [
+        (paper, name, read_page(paper, name, data_dir))
+        for name, _, _ in page_stats(paper, data_dir)
+    ]
+
+
+def update_index(data_dir=DATA_DIR, pack_dir=PACK_DIR, catalog=None,
+                 workers=None, progress=None):
+    """
+    Bring the index in line with the corpus. Returns (changed, removed)
+    paper lists. ``catalog`` (utils/catalog.py) supplies page stats without
+    rescanning the corpus.
+    """
+    if catalog is not None:
+        papers = catalog.papers()
+        stats_of = catalog.page_stats
+    else:
+        papers = list_papers(data_dir)
+        stats_of = partial(page_stats, data_dir=data_dir)
+
+    fingerprints = {
+        paper: paper_fingerprint([list(s) for s in stats_of(paper)])
+        for paper in papers
+    }
+
+    conn = connect(pack_dir)
+    try:
+        indexed = dict(conn.execute("SELECT paper, fingerprint FROM papers"))
+
+        changed = [p for p in papers if indexed.get(p) != fingerprints[p]]
+        removed = [p for p in indexed if p not in fingerprints]
+
+        with conn:
+            for paper in removed:
+                _delete_paper(conn, paper)
+                conn.execute("DELETE FROM papers WHERE paper = ?", (paper,))
+
+        # Page text is read in worker processes; writes stay on this
+        # connection, one transaction per paper so an interrupted update
+        # leaves every finished paper usable.
+        rows_iter = imap_ordered(
+            partial(_paper_rows, data_dir=data_dir), changed, workers=workers
+        )
+
+        for done, (paper, rows) in enumerate(zip(changed, rows_iter), start=1):
+            with conn:
+                _delete_paper(conn, paper)
+                _insert_pages(conn, rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO papers (paper, fingerprint) VALUES (?, ?)",
+                    (paper, fingerprints[paper]),
+                )
+            if progress:
+                progress(done, len(changed))
+
+        if changed or removed:
+            conn.execute("INSERT INTO pages (pages) VALUES ('optimize')")
+            conn.commit()
+    finally:
+        conn.close()
+
+    return changed, removed
+
+
+# --------------------------------------------------
+# Querying
+# --------------------------------------------------
+
+def to_match_query(query):
+    """
+    Turn user input into an FTS5 MATCH expression: "quoted text" stays a
+    phrase, every other word must appear. Operators are not exposed, so
+    stray punctuation cannot cause a syntax error.
+    """
+    terms = []
+    for phrase, word in TERM_PATTERN.findall(query):
+        text = (phrase or word).replace('"', "")
+        if text.strip():
+            terms.append('"' + text + '"')
+    return " ".join(terms)
+
+
+def _hit_offsets(marked):
+    """Character offsets of highlight() markers in the unmarked text."""
+    offsets = []
+    removed = 0
+    start = None
+
+    for i, ch in enumerate(marked):
+        if ch == _OPEN:
+            start = i - removed
+            removed += 1
+        elif ch == _CLOSE:
+            offsets.append((start, i - removed))
+            removed += 1
+
+    return offsets
+
+
+def search(query, limit=50, pack_dir=PACK_DIR, papers=None):
+    """
+    BM25-ranked page hits for ``query``: dicts with paper, page, score,
+    snippet and offsets, a list of (start, end) character spans of every
+    matched term in the page text. ``papers`` restricts the search.
+    """
+    match = to_match_query(query)
+    if not match:
+        return []
+
+    sql = (
+        "SELECT paper, page, rank, "
+        "snippet(pages, 2, '**', '**', ' … ', 16), "
+        "highlight(pages, 2, ?, ?) "
+        "FROM pages WHERE pages MATCH ?"
+    )
+    params = [_OPEN, _CLOSE, match]
+
+    if papers:
+        sql += " AND paper IN (%s)" % ",".join("?" * len(papers))
+        params.extend(papers)
+
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+
+    conn = connect(pack_dir)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "paper": paper,
+            "page": page,
+            # rank is bm25(), lower-is-better; flip it for display.
+            "score": -score,
+            "snippet": snippet,
+            "offsets": _hit_offsets(marked),
+        }
+        for paper, page, score, snippet, marked in rows
+    ]
+
+
+def index_summary(pack_dir=PACK_DIR):
+    conn = connect(pack_dir)
+    try:
+        n_papers = conn.execute("SELECT count(*) FROM papers").fetchone()[0]
+        n_pages = conn.execute("SELECT count(*) FROM pages").fetchone()[0]
+    finally:
+        conn.close()
+    return n_papers, n_pages
@@ -0,0 +1,108 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.fileio import atomic_path
+
+# Extracted section rows as Parquet, one file per paper, in one directory
+# per extractor:
+#
+#   data/cluster_journal_label/<paper>.parquet     (0_0_4, labels)
+#   data/cluster_journal_dynamic/<paper>.parquet   (0_0_7, dynamic)
+#
+# Re-extracting a paper rewrites only its file. Viewers read just the
+# metadata columns across all files (column projection; the spans column
+# is never decoded for the table), then fetch the spans of the one row
+# being previewed from that paper's file. Section text is not stored: it
+# is read from the corpus pages the spans cover (utils.sections.section_text),
+# after checking the row's text fingerprint against the paper.
+#
+# Files starting with "_" or "." (the manifest, temp files) are skipped
+# by the dataset reader.
+
+META_COLUMNS = ["journal_name", "section_label", "word_count", "sentence_count", "char_count"]
+
+SCHEMA = pa.schema([
+    ("journal_name", pa.string()),
+    ("section_label", pa.string()),
+    ("word_count", pa.int64()),
+    ("sentence_count", pa.int64()),
+    ("char_count", pa.int64()),
+    ("spans", pa.list_(pa.list_(pa.int64()))),
+    ("fingerprint", pa.string()),
+])
+
+SUFFIX = ".parquet"
+
+
+def paper_file(output_dir, paper):
+    return os.path.join(output_dir, paper + SUFFIX)
+
+
+def stored_papers(output_dir):
+    if not os.path.isdir(output_dir):
+        return []
+    return sorted(
+        name[:-len(SUFFIX)] for name in os.listdir(output_dir)
+        if name.endswith(SUFFIX) and not name.startswith((".", "_"))
+    )
+
+
+# --------------------------------------------------
+# Writing
+# --------------------------------------------------
+
+def write_paper(output_dir, paper, rows):
+    """Replace one paper's rows (atomically; readers never see a partial file)."""
+    os.makedirs(output_dir, exist_ok=True)
+    table = pa.Table.from_pylist(
+        [{name: row.get(name) for name in SCHEMA.names} for row in rows],
+        schema=SCHEMA,
+    )
+
+    with atomic_path(paper_file(output_dir, paper)) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+
+def remove_paper(output_dir, paper):
+    path = paper_file(output_dir, paper)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# --------------------------------------------------
+# Reading
+# --------------------------------------------------
+
+def read_metadata(output_dir, columns=META_COLUMNS):
+    """
+    DataFrame of ``columns`` for every stored row, papers in name order and
+    rows in extraction order. ``row`` numbers each paper's rows for
+    read_row.
+    """
+    papers = stored_papers(output_dir)
+    if not papers:
+        return pd.DataFrame(columns=list(columns) + ["row"])
+
+    dataset = ds.dataset([paper_file(output_dir, p) for p in papers], format="parquet")
+    columns = list(dict.fromkeys(["journal_name", *columns]))
+    df = dataset.to_table(columns=columns).to_pandas()
+    df["row"] = df.groupby("journal_name", sort=False).cumcount()
+    return df
+
+
+def read_row(output_dir, paper, row):
+    """All columns of one stored row, as a dict."""
+    table = pq.read_table(paper_file(output_dir, paper))
+    return table.slice(row, 1).to_pylist()[0]
+
+
+def read_rows(output_dir, papers=None):
+    """Full rows (with spans) of ``papers``, or of every stored paper."""
+    rows = []
+    for paper in papers if papers is not None else stored_papers(output_dir):
+        rows.extend(pq.read_table(paper_file(output_dir, paper)).to_pylist())
+    return rows
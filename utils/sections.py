@@ -0,0 +1,525 @@
+import re
+
+from utils.corpus import DATA_DIR, open_paper, page_range
+from utils.header_matcher import compile_headers, compile_labels
+from utils.intervals import IntervalSet
+from utils.text_metrics import text_metrics
+
+# Section splitting shared by the extractor pages and their worker
+# processes. Nothing here imports Streamlit.
+
+# --------------------------------------------------
+# Spans
+# --------------------------------------------------
+
+# Extracted sections are stored as character spans into the paper's full
+# text (utils.corpus.read_full_text) instead of copies of the text. A
+# section is a list of [start, end, first_page, last_page] spans; the
+# "others" remainder has one span per uncovered chunk. The page range is
+# half-open and indexes the paper's pages, so a viewer can decode just
+# those pages. Spans written before page ranges were stored are
+# [start, end] and still accepted everywhere.
+#
+# Offsets are only meaningful for the text they were taken from, so every
+# stored span set travels with the paper's text fingerprint
+# (PackedPaper.fingerprint). Reading spans against a paper whose text has
+# changed since raises StaleSpansError instead of returning the wrong
+# characters. Span sets stored without a fingerprint are read unchecked.
+
+
+class StaleSpansError(ValueError):
+    """Stored spans point into an earlier version of a paper's text."""
+
+    def __init__(self, paper):
+        super().__init__(
+            f"{paper}: the paper's text changed since these sections were "
+            f"extracted; extract them again."
+        )
+        self.paper = paper
+
+
+def check_fingerprint(packed, fingerprint):
+    if fingerprint is not None and fingerprint != packed.fingerprint:
+        raise StaleSpansError(packed.paper)
+
+
+def strip_span(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return [start, end]
+
+
+def join_spans(text, spans):
+    return "\n".join(text[start:end] for start, end, *_ in spans).strip()
+
+
+def with_pages(spans, char_offsets):
+    """Attach page ranges to [start, end] spans from a char_offsets table."""
+    return [
+        [start, end, *page_range(char_offsets, start, end)]
+        for start, end, *_ in spans
+    ]
+
+
+def spans_page_range(spans):
+    """(first, last) pages covered by spans that carry page ranges, else None."""
+    ranges = [span[2:4] for span in spans if len(span) >= 4]
+    if not ranges or len(ranges) != len(spans):
+        return None
+    return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+
+def read_spans(paper, spans, data_dir=DATA_DIR, stats=None, fingerprint=None):
+    """Text of stored spans, decoding only the pages they fall on."""
+    packed = open_paper(paper, data_dir, stats=stats)
+    check_fingerprint(packed, fingerprint)
+    return "\n".join(packed.span_text(*span[:4]) for span in spans).strip()
+
+
+def span_text(text, value):
+    """Text of a stored section; values written before spans are text already."""
+    if isinstance(value, str):
+        return value
+    return join_spans(text, value or [])
+
+
+def find_occurrences(text, snippet):
+    """Start offsets of every occurrence of ``snippet`` in ``text``."""
+    starts = []
+    if not snippet:
+        return starts
+
+    i = text.find(snippet)
+    while i != -1:
+        starts.append(i)
+        i = text.find(snippet, i + 1)
+    return starts
+
+
+def _remaining_spans(text, covered_ranges):
+    covered = IntervalSet(covered_ranges)
+    return [[start, end] for start, end in covered.gaps(0, len(text))]
+
+
+def _with_text(text, sections, remaining):
+    return (
+        {label: join_spans(text, spans) for label, spans in sections.items()},
+        join_spans(text, remaining),
+    )
+
+
+# --------------------------------------------------
+# Splitters
+# --------------------------------------------------
+
+def section_span(text, section_keywords):
+    pattern = r"(#.+?)\n"
+    headers = [(m.start(), m.group()) for m in re.finditer(pattern, text)]
+
+    for i, (pos, header) in enumerate(headers):
+        header_lower = header.lower()
+
+        if any(keyword in header_lower for keyword in section_keywords):
+            start = pos
+            end = headers[i + 1][0] if i + 1 < len(headers) else len(text)
+            return [strip_span(text, start, end)]
+
+    return []
+
+
+def extract_section(text, section_keywords):
+    return join_spans(text, section_span(text, section_keywords))
+
+
+def section_spans_with_others(text):
+    """
+    Detect structured sections and compute leftover text using index boundaries.
+    Returns ({label: spans}, remaining spans).
+    """
+
+    pattern = r"""
+    (
+        ^\s*#+\s+.*$           |   # Markdown headers
+        ^\s*\d+\.\s+.*$        |   # 1. Introduction
+        ^\s*Abstract\s*$       |   # Abstract
+        ^\s*Literature review.*$
+    )
+    """
+
+    matches = list(
+        re.finditer(
+            pattern,
+            text,
+            re.MULTILINE | re.IGNORECASE | re.VERBOSE
+        )
+    )
+
+    sections = {}
+    covered_ranges = []
+
+    for i, match in enumerate(matches):
+        header = match.group().strip().lower()
+        start = match.start()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+
+        content = [strip_span(text, start, end)]
+        covered_ranges.append((start, end))
+
+        if "abstract" in header:
+            sections["abstract"] = content
+        elif "introduction" in header:
+            sections["introduction"] = content
+        elif "literature" in header:
+            sections["literature_review"] = content
+
+    return sections, _remaining_spans(text, covered_ranges)
+
+
+def split_sections_with_others(text):
+    return _with_text(text, *section_spans_with_others(text))
+
+
+def section_spans(text, label_config):
+
+    pattern = r"""
+    (
+        ^\s*#+\s+.*$           |
+        ^\s*\d+\.\s+.*$
+    )
+    """
+
+    matches = list(
+        re.finditer(
+            pattern,
+            text,
+            re.MULTILINE | re.IGNORECASE | re.VERBOSE
+        )
+    )
+
+    # All variants are matched in one scan per header; see
+    # utils/header_matcher.py for the tie-breaking rules.
+    matcher = compile_labels(label_config)
+
+    sections = {}
+    covered_ranges = []
+
+    for i, match in enumerate(matches):
+        header = match.group().strip().lower()
+        start = match.start()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+
+        covered_ranges.append((start, end))
+
+        label_key = matcher.match(header)
+        if label_key is not None:
+            sections[label_key] = [strip_span(text, start, end)]
+
+    return sections, _remaining_spans(text, covered_ranges)
+
+
+def split_sections(text, label_config):
+    return _with_text(text, *section_spans(text, label_config))
+
+
+def clean_header(header):
+    header = re.sub(r"^#+\s*", "", header)
+    header = re.sub(r"^(?:\d+\.(?:\d+\.?)*|[IVXLC]+\.)\s*", "", header)
+    return header.strip()
+
+
+# What may precede a header on its line: markdown hashes, bold markers and
+# numbering such as "4.", "2.1", "4 |" or "IV.".
+HEADER_NUMBER = r"(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.)\s*\|?"
+HEADER_PREFIX = re.compile(r"[#*\s]*(?:" + HEADER_NUMBER + r"\s*)?$")
+
+
+def _header_line_start(text, pos):
+    line_start = text.rfind("\n", 0, pos) + 1
+    if HEADER_PREFIX.match(text, line_start, pos):
+        return line_start
+    return None
+
+
+def find_header_candidates(full_text, headers):
+    """
+    Locate every occurrence of every header in one scan of the text.
+    Returns {header.lower(): [(start, at_line_start), ...]} in document
+    order. Occurrences that open a line (after optional hashes or
+    numbering) start at that line, so the numbering stays with the section.
+    """
+    scanner = compile_headers(sorted({h.lower() for h in headers}))
+    candidates = {h: [] for h in scanner.headers}
+
+    # Where several headers start at the same place the longest wins, and
+    # occurrences inside an earlier one are dropped, so "Results and
+    # Discussion" is neither an occurrence of "Results" nor of "Discussion".
+    longest = {}
+    for start, end, header in scanner.finditer(full_text):
+        if start not in longest or end > longest[start][0]:
+            longest[start] = (end, header)
+
+    covered = 0
+    for start in sorted(longest):
+        end, header = longest[start]
+        if start < covered:
+            continue
+        covered = end
+
+        line_start = _header_line_start(full_text, start)
+        if line_start is None:
+            candidates[header].append((start, False))
+        else:
+            candidates[header].append((line_start, True))
+
+    return candidates
+
+
+def _pick_occurrence(occurrences, cursor, used):
+    free = [o for o in occurrences if o[0] not in used]
+    after = [o for o in free if o[0] >= cursor]
+
+    for pool in (after, free):
+        for start, at_line_start in pool:
+            if at_line_start:
+                return start
+        if pool:
+            return pool[0][0]
+
+    return None
+
+
+def custom_header_spans(full_text, header_lines):
+    """
+    Segment ``full_text`` at the pasted ``header_lines``; returns
+    {header: spans}.
+
+    Headers are resolved in the order they were pasted: each takes its
+    first occurrence after the previous header, preferring occurrences
+    that open a line. A header listed more than once takes successive
+    occurrences and is keyed "Header (2)", "Header (3)", ...
+    """
+    cleaned_headers = [clean_header(h) for h in header_lines if h.strip()]
+    cleaned_headers = [h for h in cleaned_headers if h]
+
+    candidates = find_header_candidates(full_text, cleaned_headers)
+
+    positions = []
+    used = set()
+    seen = {}
+    cursor = 0
+
+    for header in cleaned_headers:
+        start = _pick_occurrence(candidates[header.lower()], cursor, used)
+        if start is None:
+            continue
+
+        used.add(start)
+        cursor = start + 1
+
+        seen[header] = seen.get(header, 0) + 1
+        key = header if seen[header] == 1 else f"{header} ({seen[header]})"
+        positions.append((start, key))
+
+    positions = sorted(positions, key=lambda x: x[0])
+
+    segments = {}
+
+    if not positions:
+        return segments
+
+    # Text before first header
+    first_start = positions[0][0]
+
+    if first_start > 0:
+        pre_span = strip_span(full_text, 0, first_start)
+        if pre_span[1] - pre_span[0] > 30:
+            segments["Pre-Section"] = [pre_span]
+
+    # Header segments
+    for i in range(len(positions)):
+
+        start = positions[i][0]
+        header_label = positions[i][1]
+
+        end = positions[i + 1][0] if i + 1 < len(positions) else len(full_text)
+
+        segment_span = strip_span(full_text, start, end)
+
+        if segment_span[1] - segment_span[0] > 30:
+            segments[header_label] = [segment_span]
+
+    return segments
+
+
+def split_by_custom_headers(full_text, header_lines):
+    return {
+        header: join_spans(full_text, spans)
+        for header, spans in custom_header_spans(full_text, header_lines).items()
+    }
+
+
+def compute_metadata(text):
+    # Counted without materialising tokens; see utils/text_metrics.py.
+    return text_metrics(text)
+
+
+# --------------------------------------------------
+# Per-paper records
+# --------------------------------------------------
+
+def section_record(journal_name, label, text, spans, fingerprint=None):
+    metadata = compute_metadata(text)
+
+    return {
+        "journal_name": journal_name,
+        "section_label": label,
+        "word_count": metadata["word_count"],
+        "sentence_count": metadata["sentence_count"],
+        "char_count": metadata["char_count"],
+        "spans": spans,
+        "fingerprint": fingerprint,
+    }
+
+
+def section_records(packed, full_text, sections, remaining):
+    records = [
+        section_record(
+            packed.paper, label, join_spans(full_text, spans),
+            with_pages(spans, packed.char_offsets), packed.fingerprint
+        )
+        for label, spans in sections.items()
+    ]
+
+    # Tiny leftovers are page furniture, not content.
+    remaining_text = join_spans(full_text, remaining)
+    if len(remaining_text) > 100:
+        records.append(section_record(
+            packed.paper, "others", remaining_text,
+            with_pages(remaining, packed.char_offsets), packed.fingerprint
+        ))
+
+    return records
+
+
+def parse_cluster_text(journal_name, data_dir=DATA_DIR):
+    """Record used by the Journal Clustering page."""
+    packed = open_paper(journal_name, data_dir)
+    full_text = packed.full_text()
+
+    record = {"journal_name": journal_name, "fingerprint": packed.fingerprint}
+    for field, keyword in [
+        ("abstract", "abstract"),
+        ("introduction", "introduction"),
+        ("literature_review", "literature review"),
+    ]:
+        record[field] = with_pages(
+            section_span(full_text, [keyword]), packed.char_offsets
+        )
+
+    return record
+
+
+# Extractor tags recorded in the manifests of the Parquet outputs (see
+# utils/manifest.py); bump one when its rows change so every paper is
+# re-extracted.
+LABELS_EXTRACTOR = "section_label_extractor:v4"
+DYNAMIC_EXTRACTOR = "dynamic_section_extractor:v5"
+
+
+def parse_labeled_sections(journal_name, data_dir=DATA_DIR):
+    packed = open_paper(journal_name, data_dir)
+    full_text = packed.full_text()
+    sections, remaining = section_spans_with_others(full_text)
+    return section_records(packed, full_text, sections, remaining)
+
+
+def parse_dynamic_sections(journal_name, label_config, data_dir=DATA_DIR):
+    packed = open_paper(journal_name, data_dir)
+    full_text = packed.full_text()
+    sections, remaining = section_spans(full_text, label_config)
+    return section_records(packed, full_text, sections, remaining)
+
+
+def parse_custom_segments(journal_name, header_lines, data_dir=DATA_DIR):
+    """Record with the paper's {header: spans} segments and text fingerprint."""
+    packed = open_paper(journal_name, data_dir)
+    segments = custom_header_spans(packed.full_text(), header_lines)
+    return {
+        "journal_name": journal_name,
+        "fingerprint": packed.fingerprint,
+        "segments": {
+            header: with_pages(spans, packed.char_offsets)
+            for header, spans in segments.items()
+        },
+    }
+
+
+def stale_papers(rows, data_dir=DATA_DIR, stats_of=None):
+    """
+    Papers whose stored rows were extracted from a different version of
+    their text, or before fingerprints were stored. ``stats_of`` (the
+    catalog's page_stats) saves the page scans.
+    """
+    stored = {}
+    for row in rows:
+        stored.setdefault(row["journal_name"], set()).add(row.get("fingerprint"))
+
+    stale = []
+    for paper, fingerprints in stored.items():
+        stats = stats_of(paper) if stats_of else None
+        if fingerprints != {open_paper(paper, data_dir, stats=stats).fingerprint}:
+            stale.append(paper)
+    return stale
+
+
+# --------------------------------------------------
+# Materialising text
+# --------------------------------------------------
+
+def materialise(rows, fields=("spans",), data_dir=DATA_DIR):
+    """
+    Copies of ``rows`` with span fields turned into text: "spans" becomes
+    "text", other fields keep their name. Rows are expected grouped by
+    journal_name; only one paper's text is held at a time.
+    """
+    out = []
+    paper = packed = full_text = None
+
+    for row in rows:
+        row = dict(row)
+        fingerprint = row.get("fingerprint")
+
+        if row.get("journal_name") != paper:
+            paper = row.get("journal_name")
+            packed = full_text = None
+
+        for field in fields:
+            if field not in row:
+                continue
+            value = row[field]
+            if full_text is None and not isinstance(value, str):
+                packed = open_paper(paper, data_dir)
+                full_text = packed.full_text()
+            if not isinstance(value, str):
+                check_fingerprint(packed, fingerprint)
+
+            if field == "spans":
+                del row["spans"]
+                row["text"] = span_text(full_text, value)
+            else:
+                row[field] = span_text(full_text, value)
+
+        out.append(row)
+
+    return out
+
+
+def section_text(row, data_dir=DATA_DIR):
+    """Text of one row, reading only the pages its spans cover."""
+    if "spans" not in row:
+        return row.get("text", "")
+    return read_spans(
+        row["journal_name"], row["spans"], data_dir, fingerprint=row.get("fingerprint")
+    )
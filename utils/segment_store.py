@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+
+from utils.fileio import atomic_write, file_lock
+
+# Approved segmentations as an append-only JSON-lines log,
+# data/approved_segments.jsonl. Every approval appends one line per paper
+#
+#   {"paper": ..., "segments": {header: spans}, "fingerprint": ..., "time": ...}
+#
+# and the latest line for a paper wins. ``fingerprint`` is the paper's
+# text fingerprint (PackedPaper.fingerprint) the spans were taken from.
+# Each process keeps an index of {paper: (offset, length)} for the latest
+# lines and only reads bytes appended since it last looked, so approving
+# costs one small write however many papers are stored. Writers serialise
+# across processes on a sidecar .lock file (utils.fileio.file_lock), and
+# each store holds a thread lock around its index so concurrent Streamlit
+# sessions never interleave a refresh with an append; compaction rewrites
+# the live lines atomically once superseded lines outnumber them.
+#
+# A legacy data/approved_segments.json (one dict rewritten per approval)
+# is imported on first use and left in place.
+
+COMPACT_MIN_STALE = 100
+
+# path -> SegmentStore, reused across Streamlit reruns
+_stores = {}
+
+
+def legacy_path(path):
+    root, _ = os.path.splitext(path)
+    return root + ".json"
+
+
+def _encode(paper, segments, fingerprint=None):
+    record = {
+        "paper": paper,
+        "segments": segments,
+        "fingerprint": fingerprint,
+        "time": round(time.time(), 3),
+    }
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class SegmentStore:
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self.fingerprints = {}
+        self.lines = 0
+        self.size = 0
+        self.inode = None
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------
+    # Index
+    # --------------------------------------------------
+
+    def _reset(self):
+        self.index = {}
+        self.fingerprints = {}
+        self.lines = 0
+        self.size = 0
+
+    def refresh(self):
+        """Index lines appended (or a compaction done) since the last call."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            self.inode = None
+            return
+
+        if stat.st_ino != self.inode or stat.st_size < self.size:
+            self._reset()
+            self.inode = stat.st_ino
+
+        if stat.st_size == self.size:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.size)
+            offset = self.size
+            for line in f:
+                # A line without its newline is an append still in progress
+                # (or a crashed one); it is picked up or truncated later.
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                    paper = record["paper"]
+                except (ValueError, KeyError):
+                    paper = None
+                if paper is not None:
+                    self.index[paper] = (offset, len(line))
+                    self.fingerprints[paper] = record.get("fingerprint")
+                self.lines += 1
+                offset += len(line)
+            self.size = offset
+
+    def _migrate(self):
+        legacy = legacy_path(self.path)
+        if os.path.exists(self.path) or not os.path.exists(legacy):
+            return
+        with open(legacy, "r", encoding="utf-8") as f:
+            approved = json.load(f)
+        atomic_write(self.path, b"".join(
+            _encode(paper, segments) for paper, segments in approved.items()
+        ))
+
+    # --------------------------------------------------
+    # Reading
+    # --------------------------------------------------
+
+    def __contains__(self, paper):
+        with self._lock:
+            self._refresh()
+            return paper in self.index
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self.index)
+
+    def papers(self):
+        with self._lock:
+            self._refresh()
+            return list(self.index)
+
+    def fingerprint(self, paper):
+        """Text fingerprint the paper's approved spans were taken from, or None."""
+        with self._lock:
+            self._refresh()
+            return self.fingerprints.get(paper)
+
+    def get(self, paper, default=None):
+        with self._lock:
+            self._refresh()
+            if paper not in self.index:
+                return default
+            offset, length = self.index[paper]
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.read(length))["segments"]
+
+    def load_all(self):
+        """{paper: segments} for every stored paper, latest version each."""
+        approved = {}
+        with self._lock:
+            self._refresh()
+            if not self.index:
+                return approved
+            with open(self.path, "rb") as f:
+                for paper, (offset, length) in sorted(self.index.items(), key=lambda kv: kv[1]):
+                    f.seek(offset)
+                    approved[paper] = json.loads(f.read(length))["segments"]
+        return approved
+
+    # --------------------------------------------------
+    # Writing
+    # --------------------------------------------------
+
+    def put(self, updates, fingerprints=None):
+        """
+        Append {paper: segments}, with each paper's text fingerprint from
+        ``fingerprints``; earlier versions are superseded.
+        """
+        if not updates:
+            return
+
+        fingerprints = fingerprints or {}
+        data = b"".join(
+            _encode(paper, segments, fingerprints.get(paper))
+            for paper, segments in updates.items()
+        )
+
+        with self._lock, file_lock(self.path):
+            self._migrate()
+            self._refresh()
+
+            with open(self.path, "ab") as f:
+                # Drop a torn line left by a writer that died mid-append.
+                if f.tell() > self.size:
+                    f.truncate(self.size)
+                f.write(data)
+
+            self._refresh()
+
+            if self.lines - len(self.index) > max(COMPACT_MIN_STALE, len(self.index)):
+                self._compact()
+
+    def compact(self):
+        """Rewrite the log with only the latest line per paper."""
+        with self._lock, file_lock(self.path):
+            self._migrate()
+            self._refresh()
+            if os.path.exists(self.path):
+                self._compact()
+
+    def _compact(self):
+        with open(self.path, "rb") as f:
+            chunks = []
+            for offset, length in sorted(self.index.values()):
+                f.seek(offset)
+                chunks.append(f.read(length))
+        atomic_write(self.path, b"".join(chunks))
+        self.inode = None
+        self._refresh()
+
+
+def get_segment_store(path):
+    """Shared store for ``path``, migrating a legacy .json file once."""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = SegmentStore(path)
+        if not os.path.exists(path) and os.path.exists(legacy_path(path)):
+            with store._lock, file_lock(path):
+                store._migrate()
+    return store
@@ -0,0 +1,157 @@
+import os
+import random
+
+# OCR-like markdown papers for benchmarking the section splitters, written
+# in the data/ocr_pdf layout (<paper>_pdf/pages/page_NNNN.md).
+#
+# Pages mimic the samples: journal furniture on the first page, markdown
+# and numbered section headers (including the "2.1." sub-sections and
+# bare "Abstract" lines the splitters look for), LaTeX-ish affiliations,
+# tables, image links and a long numbered reference list, which matches
+# the numbered-header patterns line after line.
+
+SECTIONS = [
+    "Introduction",
+    "Literature review",
+    "Theoretical background",
+    "Hypotheses development",
+    "Materials and Methods",
+    "Research design",
+    "Results",
+    "Results and Discussion",
+    "Discussion",
+    "Robustness checks",
+    "Directions for Future Research",
+    "Conclusions",
+]
+
+WORDS = (
+    "sustainability disclosure greenwashing assurance firms reporting "
+    "environmental social governance investors legitimacy evidence sample "
+    "regression coefficient significant model variable effect analysis "
+    "stakeholders decoupling performance information quality market risk "
+    "the of and to in a for is on that with as by an are this be or from"
+).split()
+
+FURNITURE = [
+    "Received: {d} March 2023\n\nRevised: {d} November 2023\n\nAccepted: {d} November 2023",
+    "DOI: 10.{d}{d}/journal.{d}{d}{d}",
+    "OPEN ACCESS\n\nCheck for updates",
+    "Routledge Taylor &amp; Francis Group",
+]
+
+
+def _sentence(rng):
+    words = rng.choices(WORDS, k=rng.randint(8, 30))
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([".", ".", ".", "?", "!"])
+
+
+def _paragraph(rng):
+    text = " ".join(_sentence(rng) for _ in range(rng.randint(2, 7)))
+    if rng.random() < 0.2:
+        text += f" ({rng.choice(WORDS).capitalize()} et al., {rng.randint(1990, 2025)})"
+    return text
+
+
+def _header(rng, number, title, sub=None):
+    label = f"{number}.{sub}." if sub else f"{number}."
+    style = rng.random()
+    if style < 0.5:
+        return f"{'#' * (2 if sub else 1)} {label} {title}"
+    if style < 0.8:
+        return f"{label} {title}"
+    return f"**{label} {title}**"
+
+
+def _table(rng):
+    rows = ["| Variable | Mean | SD | N |", "| --- | --- | --- | --- |"]
+    for _ in range(rng.randint(3, 10)):
+        rows.append(
+            f"| {rng.choice(WORDS)} | {rng.random():.3f} | {rng.random():.3f} | {rng.randint(100, 9000)} |"
+        )
+    return "\n".join(rows)
+
+
+def _reference(rng, i):
+    authors = "; ".join(
+        f"{rng.choice(WORDS).capitalize()}, {rng.choice('ABCDEFGHJKLMNPRSTW')}."
+        for _ in range(rng.randint(1, 4))
+    )
+    return f"{i}. {authors} {_sentence(rng)} J. {rng.choice(WORDS).capitalize()}. {rng.randint(1990, 2025)}, {rng.randint(1, 60)}, {rng.randint(1, 900)}."
+
+
+def generate_blocks(rng, n_pages):
+    """Markdown blocks of one paper, in reading order, for ``n_pages`` pages."""
+    blocks = [
+        f.format(d=rng.randint(1, 28))
+        for f in rng.sample(FURNITURE, k=rng.randint(1, len(FURNITURE)))
+    ]
+    blocks.append("# " + " ".join(rng.choices(WORDS, k=rng.randint(5, 12))).capitalize())
+    blocks.append("$^{a}$School of Business, University; $^{b}$School of Accounting, University")
+    blocks.append(rng.choice(["Abstract", "## ABSTRACT", "# Abstract"]))
+    blocks.append(_paragraph(rng))
+
+    # Roughly 6 body blocks per page, then about a fifth of the pages of
+    # references.
+    body_blocks = max(4, int(n_pages * 6 * 0.8))
+    n_refs = max(5, n_pages * 3)
+
+    sections = [SECTIONS[0]] + sorted(
+        rng.sample(SECTIONS[1:-1], k=rng.randint(3, 6)), key=SECTIONS.index
+    ) + [SECTIONS[-1]]
+    per_section = max(1, body_blocks // len(sections))
+
+    for number, title in enumerate(sections, start=1):
+        blocks.append(_header(rng, number, title))
+        for i in range(per_section):
+            if i and rng.random() < 0.15:
+                blocks.append(_header(rng, number, rng.choice(WORDS).capitalize(), sub=i))
+            roll = rng.random()
+            if roll < 0.08:
+                blocks.append(_table(rng))
+            elif roll < 0.12:
+                blocks.append(f"![](images/img_{rng.randint(0, 999):03d}.jpeg)\n\nFigure {number}. {_sentence(rng)}")
+            else:
+                blocks.append(_paragraph(rng))
+
+    blocks.append(rng.choice(["# References", "## REFERENCES", "References"]))
+    blocks.extend(_reference(rng, i) for i in range(1, n_refs + 1))
+
+    return blocks
+
+
+def generate_paper(rng, n_pages):
+    """Page texts of one synthetic paper."""
+    blocks = generate_blocks(rng, n_pages)
+    bounds = [i * len(blocks) // n_pages for i in range(n_pages + 1)]
+
+    return [
+        "\n\n".join(blocks[bounds[i]:bounds[i + 1]])
+        for i in range(n_pages)
+    ]
+
+
+def write_corpus(data_dir, total_pages, pages_per_paper=20, seed=0):
+    """
+    Write papers of ``pages_per_paper`` pages until ``total_pages`` pages
+    exist under ``data_dir``. Returns the paper names.
+    """
+    rng = random.Random(seed)
+    papers = []
+    written = 0
+
+    while written < total_pages:
+        n_pages = min(pages_per_paper, total_pages - written)
+        paper = f"synthetic_{len(papers):06d}_pdf"
+        pages_path = os.path.join(data_dir, paper, "pages")
+        os.makedirs(pages_path, exist_ok=True)
+
+        for i, text in enumerate(generate_paper(rng, n_pages)):
+            with open(os.path.join(pages_path, f"page_{i:04d}.md"), "w", encoding="utf-8") as f:
+                f.write(text)
+
+        papers.append(paper)
+        written += n_pages
+
+    return papers
@@ -0,0 +1,88 @@
+import re
+
+# Word, sentence and character counts without building token lists.
+#
+# Counts match the original compute_metadata:
+#   words     = len(re.findall(r"\b\w+\b", text))
+#   sentences = pieces of re.split(r"[.!?]+", text) that are not blank
+#   chars     = len(text)
+#
+# A sentence is counted at its first non-blank character, so one regex
+# match per sentence replaces the split-and-filter.
+
+WORD_PATTERN = re.compile(r"\w+")
+SENTENCE_PATTERN = re.compile(r"[^.!?\s][^.!?]*")
+
+# The same patterns for pyarrow's RE2 engine, whose \w and \s are ASCII-only.
+_ARROW_WORD = r"[\p{L}\p{N}_]+"
+_ARROW_SENTENCE = r"[^.!?\s\p{Z}\x0b\x1c-\x1f\x85][^.!?]*"
+
+
+def _count(pattern, text):
+    count = 0
+    for _ in pattern.finditer(text):
+        count += 1
+    return count
+
+
+def word_count(text):
+    return _count(WORD_PATTERN, text)
+
+
+def sentence_count(text):
+    return _count(SENTENCE_PATTERN, text)
+
+
+def text_metrics(text):
+    return {
+        "word_count": word_count(text),
+        "sentence_count": sentence_count(text),
+        "char_count": len(text)
+    }
+
+
+# --------------------------------------------------
+# Whole columns
+# --------------------------------------------------
+
+def _pyarrow_compute():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return None, None
+    return pa, pc
+
+
+def column_metrics(values):
+    """
+    Metrics for a whole column of strings (Series, list, ...) in one call,
+    returned as a DataFrame with word_count, sentence_count and char_count.
+    Uses pyarrow's regex kernels when installed; missing values count as
+    empty text.
+    """
+    import pandas as pd
+
+    index = values.index if isinstance(values, pd.Series) else None
+    pa, pc = _pyarrow_compute()
+
+    if pa is None:
+        texts = ["" if not isinstance(v, str) else v for v in values]
+        return pd.DataFrame(
+            [text_metrics(t) for t in texts], index=index,
+            columns=["word_count", "sentence_count", "char_count"]
+        )
+
+    if index is None:
+        values = list(values)
+    array = pa.array(values, type=pa.large_string(), from_pandas=True)
+    array = pc.fill_null(array, "")
+
+    return pd.DataFrame(
+        {
+            "word_count": pc.count_substring_regex(array, _ARROW_WORD).to_numpy(),
+            "sentence_count": pc.count_substring_regex(array, _ARROW_SENTENCE).to_numpy(),
+            "char_count": pc.utf8_length(array).to_numpy(),
+        },
+        index=index,
+    )
@@ -0,0 +1,78 @@
+import json
+import math
+
+import streamlit as st
+
+# Viewers for payloads too large to send to the browser in one piece.
+# Everything is sliced on the server: the page only receives the window
+# being shown, plus a page selector. Page numbers live in session state
+# under "<key>_page" and are clamped when the payload shrinks.
+
+JSON_PAGE_SIZE = 20
+JSON_LINES = 300
+TEXT_WINDOW = 20_000
+
+
+def _page_selector(n_pages, key, container):
+    if n_pages <= 1:
+        return 0
+
+    state_key = f"{key}_page"
+    if st.session_state.get(state_key, 1) > n_pages:
+        st.session_state[state_key] = n_pages
+
+    page = container.number_input(
+        f"Page (of {n_pages})",
+        min_value=1,
+        max_value=n_pages,
+        step=1,
+        key=state_key
+    )
+    return int(page) - 1
+
+
+def paginated_json(payload, key, page_size=JSON_PAGE_SIZE, container=st):
+    """Show a list, or a dict's entries, ``page_size`` items at a time."""
+    is_dict = isinstance(payload, dict)
+    items = list(payload.items()) if is_dict else list(payload)
+
+    n_pages = max(1, math.ceil(len(items) / page_size))
+    page = _page_selector(n_pages, key, container)
+
+    start = page * page_size
+    window = items[start:start + page_size]
+
+    if n_pages > 1:
+        container.caption(f"Items {start + 1}–{start + len(window)} of {len(items)}")
+    container.json(dict(window) if is_dict else window)
+
+
+def json_window(payload, key, lines=JSON_LINES, container=st):
+    """
+    Pretty-printed JSON, ``lines`` lines at a time. For deep payloads
+    (a batch with thousands of citations) where one item is already big.
+    """
+    text = json.dumps(payload, indent=2, ensure_ascii=False).splitlines()
+
+    n_pages = max(1, math.ceil(len(text) / lines))
+    page = _page_selector(n_pages, key, container)
+
+    start = page * lines
+    window = text[start:start + lines]
+
+    if n_pages > 1:
+        container.caption(f"Lines {start + 1}–{start + len(window)} of {len(text)}")
+    container.code("\n".join(window), language="json")
+
+
+def text_window(label, text, key, window=TEXT_WINDOW, height=300, container=st):
+    """A text_area holding one ``window``-character slice of ``text``."""
+    n_pages = max(1, math.ceil(len(text) / window))
+    page = _page_selector(n_pages, key, container)
+
+    start = page * window
+    end = min(len(text), start + window)
+
+    if n_pages > 1:
+        container.caption(f"Characters {start + 1:,}–{end:,} of {len(text):,}")
+    container.text_area(label, text[start:end], height=height)